@@ -1,14 +1,19 @@
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from enum import Enum, auto
-from typing import List, Dict, Optional, Protocol, Self, Callable, Any, Set
-from datetime import datetime, timedelta, time
-import uuid
+from enum import Enum, IntEnum, auto
+from typing import Protocol, Callable, Any
+from datetime import datetime, timedelta, date
 import simpy
 import random
 import math
+import itertools
+import array
+import functools
+from collections import Counter
 
 # === Core Types Module ===
-class SkillLevel(Enum):
+class SkillLevel(IntEnum):
     NOVICE = auto()
     INTERMEDIATE = auto()
     ADVANCED = auto()
@@ -32,7 +37,7 @@ class WorkerType(Enum):
     CONTRACTOR = auto()
     APPRENTICE = auto()
 
-class Shift(Enum):
+class Shift(IntEnum):
     MORNING = auto()  # 6am - 2pm
     AFTERNOON = auto()  # 2pm - 10pm
     NIGHT = auto()  # 10pm - 6am
@@ -46,7 +51,7 @@ class DayOfWeek(Enum):
     SATURDAY = 5
     SUNDAY = 6
 
-class ResourceStatus(Enum):
+class ResourceStatus(IntEnum):
     AVAILABLE = auto()
     BUSY = auto()
     UNAVAILABLE = auto()
@@ -55,7 +60,11 @@ class ResourceStatus(Enum):
     ON_BREAK = auto()
     OFF_SHIFT = auto()
 
-class MaintenanceType(Enum):
+# Employee status groups, as sets for fast membership tests
+_EMPLOYEE_WORKABLE = frozenset({ResourceStatus.AVAILABLE, ResourceStatus.ON_BREAK})
+_EMPLOYEE_AWAY = frozenset({ResourceStatus.OFF_SHIFT, ResourceStatus.UNAVAILABLE})
+
+class MaintenanceType(IntEnum):
     ROUTINE = auto()  # Regular scheduled maintenance
     PREVENTIVE = auto()  # Preventive maintenance based on usage
     CORRECTIVE = auto()  # Fix after breakdown
@@ -70,6 +79,9 @@ class OrderStatus(Enum):
     DELAYED = auto()
 
 # === Resource Module ===
+# Prebuilt timedeltas for common task and maintenance durations (minutes)
+_DURATION_DELTAS = {d: timedelta(minutes=d) for d in (15, 30, 45, 60, 90, 120, 240, 360, 480)}
+
 @dataclass
 class Resource(Protocol):
     id: str
@@ -78,47 +90,102 @@ class Resource(Protocol):
     
     def is_available(self, start_time: datetime, duration: int) -> bool: ...
 
-@dataclass
+@dataclass(slots=True)
 class WorkSchedule:
-    shifts: Dict[DayOfWeek, Optional[Shift]] = field(default_factory=dict)
-    availability: Dict[datetime, bool] = field(default_factory=dict)
-    vacation_days: Set[datetime] = field(default_factory=set)
-    sick_days: Set[datetime] = field(default_factory=set)
+    shifts: dict[DayOfWeek, Shift | None] = field(default_factory=dict)
+    availability: dict[datetime, bool] = field(default_factory=dict)
+    vacation_days: set[date] = field(default_factory=set)
+    sick_days: set[date] = field(default_factory=set)
+    # Ordinals of all vacation and sick days, for a single int membership test
+    _days_off: set[int] = field(default_factory=set, init=False, repr=False)
+    # Bit weekday*24 + hour is set when that hour of the week is on shift
+    _weekly_mask: int = field(default=0, init=False, repr=False)
+    
+    # Shift hours, end hours past 24 run into the next day
+    _SHIFT_HOURS = {
+        Shift.MORNING: (6, 14),
+        Shift.AFTERNOON: (14, 22),
+        Shift.NIGHT: (22, 30)
+    }
+    _WEEK_HOURS = 7 * 24
+    _FULL_WEEK = (1 << _WEEK_HOURS) - 1
     
     def __post_init__(self):
         # Default to no shifts assigned
         for day in DayOfWeek:
             if day not in self.shifts:
                 self.shifts[day] = None
+        self._build_weekly_mask()
+        self._days_off = {day.toordinal() for day in self.vacation_days | self.sick_days}
+    
+    def add_vacation_day(self, day: date) -> None:
+        self.vacation_days.add(day)
+        self._days_off.add(day.toordinal())
+    
+    def add_sick_day(self, day: date) -> None:
+        self.sick_days.add(day)
+        self._days_off.add(day.toordinal())
+    
+    def set_shift(self, day: DayOfWeek, shift: Shift | None) -> None:
+        """Assign a shift to a day, keeping the weekly mask in sync"""
+        self.shifts[day] = shift
+        self._build_weekly_mask()
+    
+    def _build_weekly_mask(self) -> None:
+        """Precompute on-shift status for every (weekday, hour) slot of the week"""
+        mask = 0
+        for weekday, hour in itertools.product(range(7), range(24)):
+            if (self._shift_ok(weekday, hour)
+                # A night shift started the previous day may still be running
+                or self._shift_ok((weekday - 1) % 7, hour + 24)):
+                mask |= 1 << (weekday * 24 + hour)
+        self._weekly_mask = mask
+    
+    def _shift_ok(self, weekday: int, hour: int) -> bool:
+        shift = self.shifts.get(DayOfWeek(weekday))
+        if shift is None:  # Not scheduled to work this day
+            return False
+        start_hour, end_hour = self._SHIFT_HOURS[shift]
+        return start_hour <= hour < end_hour
     
     def is_available(self, dt: datetime) -> bool:
+        return self.is_available_wdhr(dt.toordinal(), dt.weekday(), dt.hour)
+    
+    def is_available_wdhr(self, day_ordinal: int, weekday: int, hour: int) -> bool:
+        """Fast path for callers that already split the time into date ordinal, weekday and hour"""
         # Check if date is in vacation or sick days
-        if dt.date() in self.vacation_days or dt.date() in self.sick_days:
+        if day_ordinal in self._days_off:
             return False
+        return bool(self._weekly_mask >> (weekday * 24 + hour) & 1)
+    
+    def covers_interval(self, start: datetime, end: datetime) -> bool:
+        """Check if the whole [start, end] interval falls within assigned shifts"""
+        # An empty interval needs no shift time
+        if end <= start:
+            return True
         
-        # Check if time is within assigned shift
-        day_of_week = DayOfWeek(dt.weekday())
-        shift = self.shifts.get(day_of_week)
-        
-        if shift is None:  # Not scheduled to work this day
+        # Check if any date the interval touches is a vacation or sick day; end is exclusive,
+        # so an interval ending at midnight does not reach the next date
+        last_day = (end - timedelta(microseconds=1)).toordinal()
+        if any(day in self._days_off for day in range(start.toordinal(), last_day + 1)):
             return False
-            
-        # Check shift hours
-        hour = dt.hour
-        if shift == Shift.MORNING and 6 <= hour < 14:
-            return True
-        elif shift == Shift.AFTERNOON and 14 <= hour < 22:
-            return True
-        elif shift == Shift.NIGHT and (hour >= 22 or hour < 6):
-            return True
         
-        return False
+        # Hour slots touched by the interval, starting with the one containing start
+        hour_start = start.replace(minute=0, second=0, microsecond=0)
+        hours = math.ceil((end - hour_start).total_seconds() / 3600)
+        hours = min(hours, self._WEEK_HOURS)
+        
+        task_mask = ((1 << hours) - 1) << (start.weekday() * 24 + start.hour)
+        # Fold slots past the end of the week back onto its start
+        task_mask = (task_mask | task_mask >> self._WEEK_HOURS) & self._FULL_WEEK
+        
+        return (task_mask & ~self._weekly_mask) == 0
 
-@dataclass
+@dataclass(slots=True)
 class Employee:
     id: str
     name: str
-    skills: Dict[Skill, SkillLevel]
+    skills: dict[Skill, SkillLevel]
     worker_type: WorkerType
     schedule: WorkSchedule = field(default_factory=WorkSchedule)
     status: ResourceStatus = ResourceStatus.AVAILABLE
@@ -126,48 +193,60 @@ class Employee:
     fatigue_level: int = 0  # 0-100 scale
     experience_years: float = 1.0
     error_rate: float = 0.05  # Base error rate
+    # Error probability cached for the fatigue level it was computed at
+    _base_error: float = field(default=0.0, init=False, repr=False)
+    _err_prob_cached: float = field(default=0.0, init=False, repr=False)
+    _err_prob_fatigue_key: int = field(default=-1, init=False, repr=False)
+    # Skill level values indexed by skill, 0 where the skill is missing
+    _skill_levels: array.array = field(default=None, init=False, repr=False)
+    
+    def __post_init__(self):
+        # Base error rate adjusted by experience (decreases with experience)
+        self._base_error = self.error_rate / math.sqrt(self.experience_years)
+        
+        self._skill_levels = array.array('b', [0] * len(Skill))
+        for skill, level in self.skills.items():
+            self._skill_levels[skill.value - 1] = level
     
     def has_skill(self, skill: Skill, level: SkillLevel) -> bool:
-        return skill in self.skills and self.skills[skill].value >= level.value
+        return self._skill_levels[skill.value - 1] >= level
     
     def is_available(self, start_time: datetime, duration: int) -> bool:
-        if self.status not in (ResourceStatus.AVAILABLE, ResourceStatus.ON_BREAK):
+        if self.status not in _EMPLOYEE_WORKABLE:
             return False
             
         # Check entire duration of task
-        end_time = start_time + timedelta(minutes=duration)
-        current = start_time
-        
-        while current < end_time:
-            if not self.schedule.is_available(current):
-                return False
-            current += timedelta(minutes=15)  # Check in 15-minute intervals
-            
-        return True
+        end_time = start_time + (_DURATION_DELTAS.get(duration) or timedelta(minutes=duration))
+        return self.schedule.covers_interval(start_time, end_time)
     
     def calculate_error_probability(self) -> float:
         """Calculate probability of errors based on fatigue, experience, etc."""
-        # Base error rate adjusted by experience (decreases with experience)
-        base = self.error_rate / math.sqrt(self.experience_years)
+        if self._err_prob_fatigue_key == self.fatigue_level:
+            return self._err_prob_cached
         
         # Fatigue increases error rate exponentially
         fatigue_factor = 1.0 + (self.fatigue_level / 50.0)**2
         
-        return min(0.95, base * fatigue_factor)  # Cap at 95%
+        self._err_prob_cached = min(0.95, self._base_error * fatigue_factor)  # Cap at 95%
+        self._err_prob_fatigue_key = self.fatigue_level
+        return self._err_prob_cached
     
     def increase_fatigue(self, work_duration: int) -> None:
         """Increase fatigue based on work duration (in minutes)"""
         # More fatigue for longer tasks
-        self.fatigue_level += int(work_duration / 30)
+        self.fatigue_level += work_duration // 30
         self.fatigue_level = min(100, self.fatigue_level)
     
     def take_break(self, break_duration: int) -> None:
         """Reduce fatigue when taking a break"""
         # Breaks reduce fatigue
-        self.fatigue_level -= int(break_duration / 15)
+        self.fatigue_level -= break_duration // 15
         self.fatigue_level = max(0, self.fatigue_level)
 
-@dataclass
+# Maintenance log ids only need to be unique within a run
+_maint_id_seq = itertools.count(1)
+
+@dataclass(slots=True)
 class MaintenanceLog:
     maintenance_id: str
     machine_id: str
@@ -175,52 +254,67 @@ class MaintenanceLog:
     performed_by: str  # Employee ID
     start_time: datetime
     duration: int  # minutes
-    issues_found: List[str] = field(default_factory=list)
-    parts_replaced: List[str] = field(default_factory=list)
+    issues_found: list[str] = field(default_factory=list)
+    parts_replaced: list[str] = field(default_factory=list)
     success: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class MaintenanceSchedule:
     routine_interval: int  # operating hours until routine maintenance
-    last_routine: datetime = field(default_factory=datetime.now)
-    preventive_checks: List[datetime] = field(default_factory=list)
-    upcoming_maintenance: List[datetime] = field(default_factory=list)
+    last_routine_min: float = 0.0  # simulation time (minutes) of last routine maintenance
+    preventive_checks: list[datetime] = field(default_factory=list)
+    upcoming_maintenance: list[datetime] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class MachineCondition:
     wear_level: int = 0  # 0-100 scale
-    last_inspection: Optional[datetime] = None
-    known_issues: List[str] = field(default_factory=list)
+    last_inspection: datetime | None = None
+    known_issues: list[str] = field(default_factory=list)
     critical_threshold: int = 80  # Wear level at which breakdown risk increases dramatically
     
     def risk_of_failure(self) -> float:
         """Calculate probability of machine failure based on condition"""
-        if self.wear_level >= self.critical_threshold:
-            # Exponential increase in failure risk past threshold
-            return min(0.90, 0.1 + ((self.wear_level - self.critical_threshold) / 20.0)**2)
-        else:
-            # Linear increase up to threshold
-            return self.wear_level / (self.critical_threshold * 10)
+        return failure_risk(self.wear_level, self.critical_threshold)
 
-@dataclass
+@functools.lru_cache(maxsize=None)
+def failure_risk(wear_level: int, critical_threshold: int) -> float:
+    """Failure probability for a wear level, memoized since both inputs are small ints"""
+    if wear_level >= critical_threshold:
+        # Exponential increase in failure risk past threshold
+        return min(0.90, 0.1 + ((wear_level - critical_threshold) / 20.0)**2)
+    else:
+        # Linear increase up to threshold
+        return wear_level / (critical_threshold * 10)
+
+@dataclass(slots=True)
 class Machine:
     id: str
     name: str
     machine_type: str
-    skills_required: Dict[Skill, SkillLevel]
+    skills_required: dict[Skill, SkillLevel]
     status: ResourceStatus = ResourceStatus.AVAILABLE
     maintenance_schedule: MaintenanceSchedule = field(default_factory=lambda: MaintenanceSchedule(routine_interval=480))
     condition: MachineCondition = field(default_factory=MachineCondition)
-    maintenance_history: List[MaintenanceLog] = field(default_factory=list)
+    maintenance_history: list[MaintenanceLog] = field(default_factory=list)
     operating_hours: int = 0
     installation_date: datetime = field(default_factory=datetime.now)
     expected_lifetime: int = 43800  # hours (5 years at 24/7 operation)
-    maintenance_duration: Dict[MaintenanceType, int] = field(default_factory=lambda: {
+    maintenance_duration: dict[MaintenanceType, int] = field(default_factory=lambda: {
         MaintenanceType.ROUTINE: 120,     # 2 hours
         MaintenanceType.PREVENTIVE: 240,  # 4 hours
         MaintenanceType.CORRECTIVE: 360,  # 6 hours
         MaintenanceType.EMERGENCY: 480    # 8 hours
     })
+    # Called with the machine whenever its wear level changes, set by MaintenanceManager
+    wear_listener: Callable[[Machine], None] | None = field(default=None, repr=False, compare=False)
+    
+    # Wear removed by each maintenance type
+    _WEAR_REDUCTION = {
+        MaintenanceType.ROUTINE: 30,
+        MaintenanceType.PREVENTIVE: 30,
+        MaintenanceType.CORRECTIVE: 50,
+        MaintenanceType.EMERGENCY: 70
+    }
     
     def is_available(self, start_time: datetime, duration: int) -> bool:
         # Basic availability check
@@ -228,19 +322,20 @@ class Machine:
             return False
             
         # Check if maintenance is due soon
-        hours_since_maintenance = (datetime.now() - self.maintenance_schedule.last_routine).total_seconds() / 3600
-        if hours_since_maintenance >= self.maintenance_schedule.routine_interval:
+        if self.needs_maintenance(start_time.timestamp() / 60):
             return False
             
         return True
     
-    def needs_maintenance(self) -> bool:
-        """Check if machine needs scheduled maintenance"""
-        hours_since_maintenance = (datetime.now() - self.maintenance_schedule.last_routine).total_seconds() / 3600
+    def needs_maintenance(self, now: float) -> bool:
+        """Check if machine needs scheduled maintenance at simulation time now (minutes)"""
+        hours_since_maintenance = (now - self.maintenance_schedule.last_routine_min) / 60
         return hours_since_maintenance >= self.maintenance_schedule.routine_interval
     
     def increase_wear(self, operating_time: int) -> None:
         """Increase wear level based on operating time (minutes)"""
+        old_wear = self.condition.wear_level
+        
         # Convert minutes to hours
         hours = operating_time / 60
         self.operating_hours += hours
@@ -252,62 +347,65 @@ class Machine:
         
         self.condition.wear_level += int(wear_increase)
         self.condition.wear_level = min(100, self.condition.wear_level)
+        self._notify_wear(old_wear)
+    
+    def _notify_wear(self, old_wear: int) -> None:
+        if self.condition.wear_level != old_wear and self.wear_listener is not None:
+            self.wear_listener(self)
     
-    def perform_maintenance(self, maintenance_type: MaintenanceType, employee: Employee) -> MaintenanceLog:
-        """Perform maintenance on the machine"""
-        start_time = datetime.now()
+    def perform_maintenance(self, maintenance_type: MaintenanceType, employee: Employee, 
+                            start_time: float) -> MaintenanceLog:
+        """Perform maintenance on the machine, started at simulation time start_time (minutes)"""
         duration = self.maintenance_duration[maintenance_type]
         
         # Create maintenance log
         log = MaintenanceLog(
-            maintenance_id=str(uuid.uuid4()),
+            maintenance_id=f"mlog-{next(_maint_id_seq)}",
             machine_id=self.id,
             type=maintenance_type,
             performed_by=employee.id,
-            start_time=start_time,
+            start_time=datetime.fromtimestamp(start_time * 60),  # Convert SimPy time to datetime
             duration=duration
         )
         
         # Update machine state based on maintenance type
+        old_wear = self.condition.wear_level
+        self.condition.wear_level = max(0, self.condition.wear_level - self._WEAR_REDUCTION[maintenance_type])
         if maintenance_type in (MaintenanceType.ROUTINE, MaintenanceType.PREVENTIVE):
-            self.condition.wear_level = max(0, self.condition.wear_level - 30)
-            self.maintenance_schedule.last_routine = start_time
-            
-        elif maintenance_type == MaintenanceType.CORRECTIVE:
-            self.condition.wear_level = max(0, self.condition.wear_level - 50)
-            self.status = ResourceStatus.AVAILABLE
-            
-        elif maintenance_type == MaintenanceType.EMERGENCY:
-            self.condition.wear_level = max(0, self.condition.wear_level - 70)
+            self.maintenance_schedule.last_routine_min = start_time
+        else:
+            # Repairs bring a broken machine back into service
             self.status = ResourceStatus.AVAILABLE
-            
+        
         # Add to history
         self.maintenance_history.append(log)
+        self._notify_wear(old_wear)
         return log
-    
-    def check_for_failure(self) -> bool:
-        """Check if machine fails during operation"""
-        failure_probability = self.condition.risk_of_failure()
-        return random.random() < failure_probability
 
 # === Production Module ===
-@dataclass
+@dataclass(slots=True)
 class ProductionStep:
     id: str
     name: str
-    required_skills: Dict[Skill, SkillLevel]
-    required_machines: List[str]
-    required_materials: Dict[str, int]
+    required_skills: dict[Skill, SkillLevel]
+    required_machines: list[str]
+    required_materials: dict[str, int]
     duration: int  # minutes
     quality_factor: float = 1.0  # multiplier for quality based on skill level
     error_prone: bool = False  # Whether this step is particularly error-prone
     fatigue_factor: float = 1.0  # How much this task contributes to fatigue
+    # Actual durations keyed by (employee id, fatigue level)
+    _duration_cache: dict[tuple, int] = field(default_factory=dict, init=False, repr=False)
     
     def can_be_performed_by(self, employee: Employee) -> bool:
         return all(employee.has_skill(skill, level) for skill, level in self.required_skills.items())
     
     def calculate_actual_duration(self, employee: Employee) -> int:
         """Calculate actual duration based on worker skill and fatigue"""
+        key = (employee.id, employee.fatigue_level)
+        if key in self._duration_cache:
+            return self._duration_cache[key]
+        
         # Base duration
         duration = self.duration
         
@@ -317,136 +415,226 @@ class ProductionStep:
             if skill in employee.skills:
                 employee_level = employee.skills[skill]
                 # Expert is 30% faster than novice
-                skill_factor = min(skill_factor, 1.0 - (employee_level.value - required_level.value) * 0.1)
+                skill_factor = min(skill_factor, 1.0 - (employee_level - required_level) * 0.1)
         
         # Fatigue factor - higher fatigue increases time
         fatigue_factor = 1.0 + (employee.fatigue_level / 100.0) * 0.3  # Up to 30% slower when fatigued
         
         # Calculate and return the adjusted duration
-        return int(duration * skill_factor * fatigue_factor)
+        actual_duration = int(duration * skill_factor * fatigue_factor)
+        self._duration_cache[key] = actual_duration
+        return actual_duration
 
 # === Simulation Module ===
+@dataclass(slots=True)
+class MaintenanceStats:
+    routine_performed: int = 0
+    preventive_performed: int = 0
+    corrective_performed: int = 0
+    emergency_performed: int = 0
+    breakdowns: int = 0
+    total_downtime: int = 0  # minutes
+
 class MaintenanceManager:
+    # Simulated minutes that risk_of_failure applies to. Breakdowns run on elapsed time,
+    # not operating time, so an idle or off-shift machine can still fail.
+    FAILURE_RISK_PERIOD = 60
+    PREVENTIVE_WEAR_LEVEL = 50  # wear above which preventive maintenance is queued
+    
+    # Queue priority per maintenance type, lower is served first
+    _PRIORITY = {
+        MaintenanceType.EMERGENCY: 0,
+        MaintenanceType.CORRECTIVE: 1,
+        MaintenanceType.PREVENTIVE: 2,
+        MaintenanceType.ROUTINE: 3
+    }
+    
     def __init__(self, env: simpy.Environment, factory):
         self.env = env
         self.factory = factory
         self.maintenance_employees = [e for e in factory.employees 
                                      if Skill.MAINTENANCE in e.skills]
-        self.scheduled_maintenance = []
-        self.emergency_queue = []
-        self.maintenance_stats = {
-            "routine_performed": 0,
-            "preventive_performed": 0,
-            "corrective_performed": 0,
-            "emergency_performed": 0,
-            "total_downtime": 0
+        # Maintenance workers qualified at or above each skill level
+        self._maint_by_level = {
+            level: [e for e in self.maintenance_employees 
+                    if e.has_skill(Skill.MAINTENANCE, level)]
+            for level in SkillLevel
         }
+        # Single queue ordered by urgency, then by insertion order
+        self.maintenance_queue = simpy.PriorityStore(env)
+        self._queue_seq = itertools.count()
+        # Machine ids currently queued, for constant-time duplicate checks
+        self._scheduled_ids: set[str] = set()
+        self._emergency_ids: set[str] = set()
+        # Succeeds whenever a maintenance worker finishes a job or urgent work is queued
+        self._wake = env.event()
+        self.maintenance_stats = MaintenanceStats()
         
-        # Start the maintenance scheduling process
+        # Start the maintenance dispatching process
         self.env.process(self.maintenance_scheduler())
+        
+        # Draw breakdowns per machine instead of rolling for failure on every operation
+        self._failure_watchers = {
+            machine.id: self.env.process(self._failure_watcher(machine))
+            for machine in factory.machines
+        }
+        
+        # Each machine raises its own maintenance triggers instead of an hourly sweep
+        self._routine_done = {machine.id: env.event() for machine in factory.machines}
+        for machine in factory.machines:
+            self.env.process(self._routine_timer(machine))
+            self._check_wear(machine)
+            machine.wear_listener = self.wear_changed
+    
+    def wear_changed(self, machine: Machine) -> None:
+        """React to a change in a machine's wear level"""
+        self._failure_watchers[machine.id].interrupt()
+        self._check_wear(machine)
+    
+    def _check_wear(self, machine: Machine) -> None:
+        # Check for preventive maintenance based on condition
+        if (machine.condition.wear_level > self.PREVENTIVE_WEAR_LEVEL and
+            machine.status != ResourceStatus.MAINTENANCE and
+            machine.id not in self._scheduled_ids):
+            self.schedule_maintenance(machine, MaintenanceType.PREVENTIVE)
+    
+    def _routine_timer(self, machine: Machine):
+        """SimPy process that queues routine maintenance when it falls due"""
+        schedule = machine.maintenance_schedule
+        while True:
+            due_in = schedule.last_routine_min + schedule.routine_interval * 60 - self.env.now
+            if due_in > 0:
+                yield self.env.timeout(due_in)
+                continue  # Maintenance may have happened meanwhile, recheck
+            
+            if machine.id not in self._scheduled_ids:
+                self.schedule_maintenance(machine, MaintenanceType.ROUTINE)
+            # Routine or preventive maintenance resets the interval
+            yield self._routine_done[machine.id]
+    
+    def _failure_watcher(self, machine: Machine):
+        """SimPy process that breaks a machine down after an exponential waiting time
+        
+        The clock runs whenever the machine is in service, busy or idle.
+        """
+        while True:
+            rate = machine.condition.risk_of_failure() / self.FAILURE_RISK_PERIOD
+            try:
+                if rate > 0:
+                    yield self.env.timeout(random.expovariate(rate))
+                else:
+                    yield self.env.event()  # Cannot fail until wear changes
+            except simpy.Interrupt:
+                continue  # Failure times are memoryless, so just redraw
+            
+            if machine.status in (ResourceStatus.AVAILABLE, ResourceStatus.BUSY):
+                machine.status = ResourceStatus.BREAKDOWN
+                self.maintenance_stats.breakdowns += 1
+                self.schedule_maintenance(machine, MaintenanceType.CORRECTIVE)
     
     def schedule_maintenance(self, machine: Machine, maintenance_type: MaintenanceType) -> None:
         """Schedule maintenance for a machine"""
         if maintenance_type in (MaintenanceType.EMERGENCY, MaintenanceType.CORRECTIVE):
-            self.emergency_queue.append((machine, maintenance_type))
+            if machine.id in self._emergency_ids:
+                return  # A repair for this machine is already queued
+            self._enqueue((self._PRIORITY[maintenance_type], next(self._queue_seq), machine, maintenance_type))
+            # Don't leave a repair waiting out the dispatcher's retry timeout
+            self._wake_dispatcher()
+        else:
+            self._enqueue((self._PRIORITY[maintenance_type], next(self._queue_seq), machine, maintenance_type))
+    
+    def _wake_dispatcher(self) -> None:
+        wake, self._wake = self._wake, self.env.event()
+        wake.succeed()
+    
+    def _enqueue(self, item: tuple) -> None:
+        _, _, machine, maintenance_type = item
+        self.maintenance_queue.put(item)
+        if maintenance_type in (MaintenanceType.EMERGENCY, MaintenanceType.CORRECTIVE):
+            self._emergency_ids.add(machine.id)
         else:
-            self.scheduled_maintenance.append((machine, maintenance_type))
+            self._scheduled_ids.add(machine.id)
+    
+    def _find_maintenance_employee(self, level: SkillLevel) -> Employee | None:
+        """Return the first available maintenance worker with at least the given level"""
+        return next((e for e in self._maint_by_level[level] 
+                     if e.status == ResourceStatus.AVAILABLE), None)
     
     def maintenance_scheduler(self):
-        """SimPy process to manage maintenance activities"""
+        """SimPy process to dispatch queued maintenance to free workers"""
         while True:
-            # First, handle emergency repairs
-            if self.emergency_queue:
-                machine, maint_type = self.emergency_queue.pop(0)
-                
-                # Find available maintenance employee
-                available_employees = [e for e in self.maintenance_employees 
-                                      if e.status == ResourceStatus.AVAILABLE 
-                                      and e.has_skill(Skill.MAINTENANCE, SkillLevel.INTERMEDIATE)]
-                
-                if available_employees:
-                    employee = available_employees[0]
-                    employee.status = ResourceStatus.BUSY
-                    machine.status = ResourceStatus.MAINTENANCE
-                    
-                    # Record start time for downtime calculation
-                    start_time = self.env.now
-                    
-                    # Perform maintenance
-                    duration = machine.maintenance_duration[maint_type]
-                    yield self.env.timeout(duration)
-                    
-                    # Update stats
-                    self.maintenance_stats["total_downtime"] += duration
-                    if maint_type == MaintenanceType.EMERGENCY:
-                        self.maintenance_stats["emergency_performed"] += 1
-                    else:
-                        self.maintenance_stats["corrective_performed"] += 1
-                    
-                    # Update machine and employee status
-                    machine.perform_maintenance(maint_type, employee)
-                    employee.status = ResourceStatus.AVAILABLE
-                else:
-                    # No available maintenance employee, try again later
-                    yield self.env.timeout(30)  # Check again in 30 minutes
+            item = yield self.maintenance_queue.get()
+            _, _, machine, maint_type = item
+            urgent = maint_type in (MaintenanceType.EMERGENCY, MaintenanceType.CORRECTIVE)
+            if urgent:
+                self._emergency_ids.discard(machine.id)
+            else:
+                self._scheduled_ids.discard(machine.id)
             
-            # Handle scheduled maintenance
-            elif self.scheduled_maintenance:
-                machine, maint_type = self.scheduled_maintenance.pop(0)
-                
-                # Find available maintenance employee with appropriate skill
-                skill_level = SkillLevel.NOVICE if maint_type == MaintenanceType.ROUTINE else SkillLevel.INTERMEDIATE
-                available_employees = [e for e in self.maintenance_employees 
-                                      if e.status == ResourceStatus.AVAILABLE 
-                                      and e.has_skill(Skill.MAINTENANCE, skill_level)]
-                
-                if available_employees and machine.status == ResourceStatus.AVAILABLE:
-                    employee = available_employees[0]
-                    employee.status = ResourceStatus.BUSY
-                    machine.status = ResourceStatus.MAINTENANCE
-                    
-                    # Record start time for downtime calculation
-                    start_time = self.env.now
-                    
-                    # Perform maintenance
-                    duration = machine.maintenance_duration[maint_type]
-                    yield self.env.timeout(duration)
-                    
-                    # Update stats
-                    self.maintenance_stats["total_downtime"] += duration
-                    if maint_type == MaintenanceType.ROUTINE:
-                        self.maintenance_stats["routine_performed"] += 1
-                    else:
-                        self.maintenance_stats["preventive_performed"] += 1
-                    
-                    # Update machine and employee status
-                    machine.perform_maintenance(maint_type, employee)
-                    employee.status = ResourceStatus.AVAILABLE
-                else:
-                    # Either machine is busy or no maintenance person available
-                    # Put back in queue and try later
-                    self.scheduled_maintenance.append((machine, maint_type))
-                    yield self.env.timeout(60)  # Check again in 60 minutes
+            # Find available maintenance employee with appropriate skill
+            skill_level = SkillLevel.NOVICE if maint_type == MaintenanceType.ROUTINE else SkillLevel.INTERMEDIATE
+            employee = self._find_maintenance_employee(skill_level)
             
-            # Check machines for needed maintenance
-            for machine in self.factory.machines:
-                if machine.needs_maintenance() and machine.status == ResourceStatus.AVAILABLE:
-                    self.schedule_maintenance(machine, MaintenanceType.ROUTINE)
-                    
-                # Check for preventive maintenance based on condition
-                elif (machine.condition.wear_level > 50 and 
-                      machine.status == ResourceStatus.AVAILABLE and
-                      not any(m[0].id == machine.id for m in self.scheduled_maintenance)):
-                    self.schedule_maintenance(machine, MaintenanceType.PREVENTIVE)
+            # Repairs start right away, scheduled work waits for the machine to be idle
+            if employee and (urgent or machine.status == ResourceStatus.AVAILABLE):
+                employee.status = ResourceStatus.BUSY
+                machine.status = ResourceStatus.MAINTENANCE
+                self.env.process(self._perform_maintenance(machine, maint_type, employee))
+                continue
             
-            # Wait before next maintenance check
-            yield self.env.timeout(60)  # Check every hour
+            if urgent:
+                # No available maintenance employee, keep the repair first in line
+                self._enqueue(item)
+            else:
+                # Either machine is busy or no maintenance person available
+                # Put back behind other work of the same priority
+                self.schedule_maintenance(machine, maint_type)
+            
+            # Wait for a worker to finish or a repair to arrive, or retry in case one comes on shift
+            yield self._wake | self.env.timeout(30 if urgent else 60)
+    
+    def _perform_maintenance(self, machine: Machine, maint_type: MaintenanceType, employee: Employee):
+        """SimPy process for a single maintenance job"""
+        # Record start time for downtime calculation
+        start_time = self.env.now
+        
+        # Perform maintenance
+        duration = machine.maintenance_duration[maint_type]
+        yield self.env.timeout(duration)
+        
+        # Update stats
+        stats = self.maintenance_stats
+        stats.total_downtime += duration
+        if maint_type == MaintenanceType.ROUTINE:
+            stats.routine_performed += 1
+        elif maint_type == MaintenanceType.PREVENTIVE:
+            stats.preventive_performed += 1
+        elif maint_type == MaintenanceType.CORRECTIVE:
+            stats.corrective_performed += 1
+        else:
+            stats.emergency_performed += 1
+        
+        # Update machine and employee status; the machine is back in service before
+        # perform_maintenance reports its new wear level to wear_changed
+        machine.status = ResourceStatus.AVAILABLE
+        machine.perform_maintenance(maint_type, employee, start_time)
+        employee.status = ResourceStatus.AVAILABLE
+        
+        if maint_type in (MaintenanceType.ROUTINE, MaintenanceType.PREVENTIVE):
+            routine_done, self._routine_done[machine.id] = self._routine_done[machine.id], self.env.event()
+            routine_done.succeed()
+        
+        # Wake the dispatcher if it is waiting for a worker
+        self._wake_dispatcher()
 
 class EmployeeManager:
     def __init__(self, env: simpy.Environment, factory):
         self.env = env
         self.factory = factory
         self.break_schedule = {}  # Scheduled breaks
+        # On-shift flag per employee, rebuilt when the (date, hour) changes
+        self._on_shift: list[bool] = []
+        self._roster_key = None
         
         # Start the break scheduler
         self.env.process(self.manage_employee_schedules())
@@ -456,13 +644,21 @@ class EmployeeManager:
         while True:
             current_time = datetime.fromtimestamp(self.env.now * 60)  # Convert SimPy time to datetime
             
-            for employee in self.factory.employees:
+            # Shifts only start and end on the hour, so check schedules once per hour
+            day_ordinal, weekday, hour = current_time.toordinal(), current_time.weekday(), current_time.hour
+            roster_key = (day_ordinal, hour)
+            if roster_key != self._roster_key:
+                self._on_shift = [e.schedule.is_available_wdhr(day_ordinal, weekday, hour) 
+                                  for e in self.factory.employees]
+                self._roster_key = roster_key
+            
+            for employee, on_shift in zip(self.factory.employees, self._on_shift):
                 # Check if employee should be on shift
-                if employee.schedule.is_available(current_time):
+                if on_shift:
                     if employee.status == ResourceStatus.OFF_SHIFT:
                         employee.status = ResourceStatus.AVAILABLE
                 else:
-                    if employee.status not in (ResourceStatus.OFF_SHIFT, ResourceStatus.UNAVAILABLE):
+                    if employee.status not in _EMPLOYEE_AWAY:
                         employee.status = ResourceStatus.OFF_SHIFT
                 
                 # Manage breaks based on fatigue
@@ -495,6 +691,10 @@ class FactorySimulation:
     def __init__(self, env: simpy.Environment):
         self.env = env
         self.factory = self.create_realistic_factory()
+        self.employees_by_skill: dict[Skill, list[Employee]] = {skill: [] for skill in Skill}
+        for employee in self.factory.employees:
+            for skill in employee.skills:
+                self.employees_by_skill[skill].append(employee)
         self.skill_resources = {}  # Resources by skill
         self.machine_resources = {}  # Resources by machine type
         self.maintenance_manager = MaintenanceManager(env, self.factory)
@@ -512,15 +712,14 @@ class FactorySimulation:
             "avg_employee_fatigue": 0
         }
         
-        # Create SimPy resources for each skill
-        for skill in Skill:
-            skilled_employees = sum(1 for e in self.factory.employees if skill in e.skills)
-            self.skill_resources[skill] = simpy.Resource(env, capacity=skilled_employees)
+        # Create SimPy resources for each skill (SimPy rejects zero capacity)
+        for skill, skilled_employees in self.employees_by_skill.items():
+            if skilled_employees:
+                self.skill_resources[skill] = simpy.Resource(env, capacity=len(skilled_employees))
         
         # Create resources for each machine type
-        machine_types = set(machine.machine_type for machine in self.factory.machines)
-        for machine_type in machine_types:
-            machines_of_type = sum(1 for m in self.factory.machines if m.machine_type == machine_type)
+        machine_counts = Counter(m.machine_type for m in self.factory.machines)
+        for machine_type, machines_of_type in machine_counts.items():
             self.machine_resources[machine_type] = simpy.Resource(env, capacity=machines_of_type)
     
     def create_realistic_factory(self) -> BikeFactory:
@@ -613,25 +812,25 @@ class FactorySimulation:
                 # Full-time employees work 5 days a week
                 shift = Shift.MORNING if i % 3 == 0 else (Shift.AFTERNOON if i % 3 == 1 else Shift.NIGHT)
                 for day in [DayOfWeek.MONDAY, DayOfWeek.TUESDAY, DayOfWeek.WEDNESDAY, DayOfWeek.THURSDAY, DayOfWeek.FRIDAY]:
-                    schedule.shifts[day] = shift
+                    schedule.set_shift(day, shift)
                     
             elif worker_type == WorkerType.PART_TIME:
                 # Part-time employees work 3 days a week
                 shift = Shift.MORNING if i % 2 == 0 else Shift.AFTERNOON
                 days = [DayOfWeek.MONDAY, DayOfWeek.WEDNESDAY, DayOfWeek.FRIDAY] if i % 2 == 0 else [DayOfWeek.TUESDAY, DayOfWeek.THURSDAY, DayOfWeek.SATURDAY]
                 for day in days:
-                    schedule.shifts[day] = shift
+                    schedule.set_shift(day, shift)
                     
             elif worker_type == WorkerType.APPRENTICE:
                 # Apprentices work 4 days a week, morning shift
                 shift = Shift.MORNING
                 for day in [DayOfWeek.MONDAY, DayOfWeek.TUESDAY, DayOfWeek.THURSDAY, DayOfWeek.FRIDAY]:
-                    schedule.shifts[day] = shift
+                    schedule.set_shift(day, shift)
             
             # Add random vacation days
             for _ in range(random.randint(0, 10)):
                 vacation_day = datetime.now() + timedelta(days=random.randint(1, 180))
-                schedule.vacation_days.add(vacation_day.date())
+                schedule.add_vacation_day(vacation_day.date())
             
             # Calculate error rate based on experience
             error_rate = max(0.01, 0.1 - (experience / 100))
@@ -664,7 +863,7 @@ class FactorySimulation:
         # Implementation with material checks, scheduling based on shifts, etc.
         # [...]
         
-    def run_simulation(self, duration: int, order_rate: float, max_orders: int) -> Dict:
+    def run_simulation(self, duration: int, order_rate: float, max_orders: int) -> dict:
         """Run the simulation for specified duration with realistic time management"""
         # [...]
         return self.simulation_stats
\ No newline at end of file
@@ -1,20 +1,27 @@
-from dataclasses import dataclass, field
-from enum import Enum, auto
-from typing import List, Dict, Optional, Protocol, Self, Callable, Any
+from dataclasses import asdict, dataclass, field
+from enum import IntEnum, auto
+from typing import List, Dict, Optional, Protocol, Self, Callable, Any, Tuple, NamedTuple, Iterable
 from datetime import datetime, timedelta
-import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+import array
+import itertools
+import math
 import simpy
 import random
+import sys
+import time
 
 # === Core Types Module ===
 
-class ResourceStatus(Enum):
+class ResourceStatus(IntEnum):
     AVAILABLE = auto()
     BUSY = auto()
     UNAVAILABLE = auto()
     MAINTENANCE = auto()
 
-class OrderStatus(Enum):
+class OrderStatus(IntEnum):
     RECEIVED = auto()
     SCHEDULED = auto()
     IN_PRODUCTION = auto()
@@ -22,6 +29,54 @@ class OrderStatus(Enum):
     CANCELLED = auto()
 
 # === Resource Module ===
+_MAX_LEVEL = len(SkillLevel)
+
+def skill_mask(skills: Iterable[Tuple[Skill, SkillLevel]]) -> int:
+    """Pack (skill, level) pairs into an int: holding a skill at level L sets its bits for levels 1..L"""
+    mask = 0
+    for skill, level in skills:
+        mask |= ((1 << level) - 1) << ((skill.value - 1) * _MAX_LEVEL)
+    return mask
+
+def calendar_minute(t: datetime) -> int:
+    """Whole minutes since the Unix epoch, the time axis of BusyCalendar"""
+    return int(t.timestamp()) // 60
+
+@dataclass(slots=True)
+class BusyCalendar:
+    """Reserved minutes of a resource as bits of an int: bit i is minute origin + i"""
+    origin: int = 0
+    bits: int = 0
+    
+    def is_free(self, start: int, duration: int) -> bool:
+        offset = start - self.origin
+        if offset < 0:
+            # Minutes before the first reservation are free
+            duration += offset
+            if duration <= 0:
+                return True
+            offset = 0
+        return not (self.bits >> offset) & ((1 << duration) - 1)
+    
+    def next_free(self, start: int, duration: int) -> int:
+        """Earliest minute at or after start from which duration minutes are free"""
+        window_mask = (1 << duration) - 1
+        while True:
+            offset = start - self.origin
+            window = (self.bits >> offset if offset >= 0 else self.bits << -offset) & window_mask
+            if not window:
+                return start
+            # Skip past the last busy minute in the window
+            start += window.bit_length()
+    
+    def reserve(self, start: int, duration: int) -> None:
+        if not self.bits:
+            self.origin = start
+        elif start < self.origin:
+            self.bits <<= self.origin - start
+            self.origin = start
+        self.bits |= ((1 << duration) - 1) << (start - self.origin)
+
 @dataclass
 class Resource(Protocol):
     id: str
@@ -30,7 +85,7 @@ class Resource(Protocol):
     
     def is_available(self, start_time: datetime, duration: int) -> bool: ...
 
-@dataclass
+@dataclass(slots=True)
 class Material:
     id: str
     name: str
@@ -38,35 +93,52 @@ class Material:
     location: str = "warehouse"
     unit_cost: float = 0.0
 
-@dataclass
+@dataclass(slots=True)
 class Employee:
     id: str
     name: str
     skills: Dict[Skill, SkillLevel]
-    schedule: Dict[datetime, bool] = field(default_factory=dict)
+    schedule: BusyCalendar = field(default_factory=BusyCalendar)
     status: ResourceStatus = ResourceStatus.AVAILABLE
     hourly_rate: float = 20.0
+    skill_mask: int = field(init=False, repr=False, default=0)
+    
+    def __post_init__(self):
+        self.skill_mask = skill_mask(self.skills.items())
     
     def has_skill(self, skill: Skill, level: SkillLevel) -> bool:
-        return skill in self.skills and self.skills[skill].value >= level.value
+        return skill in self.skills and self.skills[skill] >= level
     
     def is_available(self, start_time: datetime, duration: int) -> bool:
-        # Simplified availability check
+        return self.is_available_at(calendar_minute(start_time), duration)
+    
+    def is_available_at(self, start: int, duration: int) -> bool:
+        """is_available for a start already in calendar minutes"""
+        return self.in_service() and self.schedule.is_free(start, duration)
+    
+    def in_service(self) -> bool:
         return self.status == ResourceStatus.AVAILABLE
 
-@dataclass
+@dataclass(slots=True)
 class Machine:
     id: str
     name: str
     machine_type: str
     skills_required: Dict[Skill, SkillLevel]
-    schedule: Dict[datetime, bool] = field(default_factory=dict)
+    schedule: BusyCalendar = field(default_factory=BusyCalendar)
     status: ResourceStatus = ResourceStatus.AVAILABLE
     maintenance_interval: int = 2400  # minutes (40 hours)
     minutes_since_maintenance: int = 0
     failure_rate: float = 0.01  # 1% chance of failure per hour
     
     def is_available(self, start_time: datetime, duration: int) -> bool:
+        return self.is_available_at(calendar_minute(start_time), duration)
+    
+    def is_available_at(self, start: int, duration: int) -> bool:
+        """is_available for a start already in calendar minutes"""
+        return self.in_service() and self.schedule.is_free(start, duration)
+    
+    def in_service(self) -> bool:
         # Check if maintenance is needed
         if self.minutes_since_maintenance >= self.maintenance_interval:
             return False
@@ -76,18 +148,26 @@ class Machine:
         return self.minutes_since_maintenance >= self.maintenance_interval
 
 # === Production Module ===
-@dataclass
+@dataclass(slots=True)
 class ProductionStep:
     id: str
     name: str
-    required_skills: Dict[Skill, SkillLevel]
+    required_skills: Tuple[Tuple[Skill, SkillLevel], ...]  # a mapping is accepted and stored as pairs
     required_machines: List[str]
-    required_materials: Dict[str, int]
+    required_materials: Tuple[Tuple[str, int], ...]  # likewise (material id, quantity) pairs
     duration: int  # minutes
     quality_factor: float = 1.0  # multiplier for quality based on skill level
+    required_mask: int = field(init=False, repr=False, default=0)
+    _duration_td: timedelta = field(init=False, repr=False, default=timedelta())
+    
+    def __post_init__(self):
+        self.required_skills = tuple(dict(self.required_skills).items())
+        self.required_materials = tuple(dict(self.required_materials).items())
+        self.required_mask = skill_mask(self.required_skills)
+        self._duration_td = timedelta(minutes=self.duration)
     
     def can_be_performed_by(self, employee: Employee) -> bool:
-        return all(employee.has_skill(skill, level) for skill, level in self.required_skills.items())
+        return employee.skill_mask & self.required_mask == self.required_mask
 
 @dataclass
 class BikeModel:
@@ -96,36 +176,41 @@ class BikeModel:
     type: str  # mountain, road, hybrid, electric
     steps: List[ProductionStep]
     base_price: float
+    materials_per_unit: Dict[str, int] = field(init=False, repr=False, default_factory=dict)
+    
+    def __post_init__(self):
+        totals = Counter()
+        for step in self.steps:
+            for material_id, quantity in step.required_materials:
+                totals[material_id] += quantity
+        self.materials_per_unit = dict(totals)
     
     def total_production_time(self) -> int:
         return sum(step.duration for step in self.steps)
 
 # === Event System ===
-@dataclass
+@dataclass(slots=True)
 class Event:
     type: str
     data: Dict
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp: int = field(default_factory=time.monotonic_ns)  # ns, only for ordering events
 
-class EventHandler(Protocol):
-    def handle(self, event: Event) -> None: ...
+EventHandler = Callable[[Event], None]
 
 class EventBus:
     def __init__(self):
-        self._handlers: Dict[str, List[EventHandler]] = {}
+        self._handlers: Dict[str, Tuple[EventHandler, ...]] = {}
     
     def subscribe(self, event_type: str, handler: EventHandler) -> None:
-        if event_type not in self._handlers:
-            self._handlers[event_type] = []
-        self._handlers[event_type].append(handler)
+        # Replace rather than extend, so a publish in progress keeps iterating its snapshot
+        self._handlers[event_type] = self._handlers.get(event_type, ()) + (handler,)
     
     def publish(self, event: Event) -> None:
-        if event.type in self._handlers:
-            for handler in self._handlers[event.type]:
-                handler.handle(event)
+        for handler in self._handlers.get(event.type, ()):
+            handler(event)
 
 # === Order Module ===
-@dataclass
+@dataclass(slots=True)
 class ScheduledTask:
     step: ProductionStep
     start_time: datetime
@@ -135,25 +220,40 @@ class ScheduledTask:
     completed: bool = False
     quality_score: float = 0.0
 
-@dataclass
+# Compact record of one scheduled step: (step index in the bike model, start minute,
+# end minute, employee index, machine mask). Minutes count from Order.scheduled_at;
+# the employee index and machine bits refer to the ResourceScheduler's resource lists.
+TaskRecord = Tuple[int, int, int, int, int]
+
+# Order ids only need to be unique within a run
+_order_id_seq = itertools.count(1)
+
+@dataclass(slots=True)
 class Order:
     id: str
     customer: str
     bike_model: BikeModel
     quantity: int
     due_date: datetime
-    tasks: List[ScheduledTask] = field(default_factory=list)
+    tasks: List[ScheduledTask] = field(default_factory=list)  # built on demand from task_records
     status: OrderStatus = OrderStatus.RECEIVED
+    scheduled_at: Optional[datetime] = None
+    task_records: List[TaskRecord] = field(default_factory=list)
     
     @classmethod
     def create(cls, customer: str, bike_model: BikeModel, quantity: int, due_date: datetime) -> Self:
         return cls(
-            id=str(uuid.uuid4()),
+            id=f"ord-{next(_order_id_seq)}",
             customer=customer,
             bike_model=bike_model,
             quantity=quantity,
             due_date=due_date
         )
+    
+    @property
+    def priority(self) -> float:
+        """SimPy request priority: lower values are served first, so earlier due dates win"""
+        return self.due_date.timestamp()
 
 # === Scheduling Module ===
 class ResourceScheduler:
@@ -161,28 +261,204 @@ class ResourceScheduler:
         self.employees = employees
         self.machines = machines
         self.inventory = inventory
+        self._step_materials: Dict[str, Optional[Tuple[Tuple[Material, int], ...]]] = {}
+        self.inventory_version = 0  # bumped whenever a material entry is added or replaced
+        self._rebuild_arrays()
+    
+    def _rebuild_arrays(self) -> None:
+        """Give each resource a bit position: employee i and machine i own bit i of the masks below"""
+        self._emp_masks: List[int] = []
+        self._emp_bits: Dict[str, int] = {}
+        self._emp_candidates: Dict[int, int] = {}  # required skill mask -> qualified employee bits
+        self._step_candidates: Dict[str, Tuple[int, int]] = {}  # step id -> (employee bits, machine bits)
+        self._machine_bits: Dict[str, int] = {}
+        self._machine_type_masks: Dict[str, int] = defaultdict(int)
+        for employee in self.employees:
+            self._index_employee(employee)
+        for machine in self.machines:
+            self._index_machine(machine)
+    
+    def _index_employee(self, employee: Employee) -> None:
+        self._emp_bits[employee.id] = len(self._emp_masks)
+        self._emp_masks.append(employee.skill_mask)
+        self._emp_candidates.clear()
+        self._step_candidates.clear()
+    
+    def _index_machine(self, machine: Machine) -> None:
+        bit = len(self._machine_bits)
+        self._machine_bits[machine.id] = bit
+        self._machine_type_masks[machine.machine_type] |= 1 << bit
+        self._step_candidates.clear()
+    
+    def add_employee(self, employee: Employee) -> None:
+        self.employees.append(employee)
+        self._index_employee(employee)
+    
+    def add_machine(self, machine: Machine) -> None:
+        self.machines.append(machine)
+        self._index_machine(machine)
     
-    def find_available_employees(self, skills_required: Dict[Skill, SkillLevel], 
+    @staticmethod
+    def _select(resources: List[Any], mask: int) -> List[Any]:
+        selected = []
+        while mask:
+            low = mask & -mask
+            selected.append(resources[low.bit_length() - 1])
+            mask ^= low
+        return selected
+    
+    @staticmethod
+    def _free(resources: List[Any], mask: int, start: int, duration: int) -> int:
+        """Clear the bits of resources not available for the window
+        
+        Status and maintenance state are read live, so changes to them need no bookkeeping.
+        """
+        remaining = mask
+        while remaining:
+            low = remaining & -remaining
+            if not resources[low.bit_length() - 1].is_available_at(start, duration):
+                mask ^= low
+            remaining ^= low
+        return mask
+    
+    def employees_in(self, mask: int) -> List[Employee]:
+        return self._select(self.employees, mask)
+    
+    def machines_in(self, mask: int) -> List[Machine]:
+        return self._select(self.machines, mask)
+    
+    def free_employees(self, mask: int, start: int, duration: int) -> int:
+        return self._free(self.employees, mask, start, duration)
+    
+    def free_machines(self, mask: int, start: int, duration: int) -> int:
+        return self._free(self.machines, mask, start, duration)
+    
+    def pick_machines(self, mask: int, machine_types: List[str]) -> Optional[int]:
+        """One machine of each type from mask, lowest bit first; None if a type has none"""
+        chosen = 0
+        for machine_type in machine_types:
+            of_type = mask & self._machine_type_masks.get(machine_type, 0)
+            if not of_type:
+                return None
+            chosen |= of_type & -of_type
+        return chosen
+    
+    @staticmethod
+    def _earliest(resources: List[Any], mask: int, start: int, duration: int) -> Optional[int]:
+        """Earliest minute at or after start when some in-service resource in mask is free; None if none is in service"""
+        earliest = None
+        while mask:
+            low = mask & -mask
+            resource = resources[low.bit_length() - 1]
+            if resource.in_service():
+                free_at = resource.schedule.next_free(start, duration)
+                if earliest is None or free_at < earliest:
+                    earliest = free_at
+            mask ^= low
+        return earliest
+    
+    def earliest_slot(self, employee_mask: int, machine_mask: int, machine_types: List[str],
+                      start: int, duration: int) -> Optional[Tuple[int, int, int]]:
+        """First (start, free employee bits, chosen machine bits) at or after start for a step
+        
+        None if the employee pool or a required machine type has nothing in service.
+        """
+        while True:
+            employees = self.free_employees(employee_mask, start, duration)
+            machines = self.pick_machines(self.free_machines(machine_mask, start, duration), machine_types)
+            if employees and machines is not None:
+                return start, employees, machines
+            
+            # No start before the latest of the pools' next free minutes can fit them all
+            later = self._earliest(self.employees, employee_mask, start, duration)
+            if later is None:
+                return None
+            for machine_type in machine_types:
+                of_type = machine_mask & self._machine_type_masks.get(machine_type, 0)
+                free_at = self._earliest(self.machines, of_type, start, duration)
+                if free_at is None:
+                    return None
+                later = max(later, free_at)
+            start = later
+    
+    def reserve(self, employee_index: int, machine_mask: int, start: int, duration: int) -> None:
+        """Book an employee and a set of machines for duration minutes from start"""
+        self.employees[employee_index].schedule.reserve(start, duration)
+        for machine in self.machines_in(machine_mask):
+            machine.schedule.reserve(start, duration)
+    
+    def employee_candidates(self, required_mask: int) -> int:
+        """Bitmask of employees qualified for a skill mask, regardless of current availability"""
+        candidates = self._emp_candidates.get(required_mask)
+        if candidates is None:
+            candidates = 0
+            for bit, mask in enumerate(self._emp_masks):
+                if mask & required_mask == required_mask:
+                    candidates |= 1 << bit
+            self._emp_candidates[required_mask] = candidates
+        return candidates
+    
+    def step_candidates(self, step: ProductionStep) -> Tuple[int, int]:
+        """Employee and machine bitmasks qualified for a step, cached until the roster changes"""
+        candidates = self._step_candidates.get(step.id)
+        if candidates is None:
+            candidates = (self.employee_candidates(step.required_mask),
+                          self.machine_candidates(step.required_machines))
+            self._step_candidates[step.id] = candidates
+        return candidates
+    
+    def machine_candidates(self, machine_types: List[str]) -> int:
+        """Bitmask of machines of the given types, regardless of current availability"""
+        candidates = 0
+        for machine_type in machine_types:
+            candidates |= self._machine_type_masks.get(machine_type, 0)
+        return candidates
+    
+    def find_available_employees(self, required_mask: int, 
                                 start_time: datetime, duration: int) -> List[Employee]:
-        return [
-            employee for employee in self.employees
-            if all(employee.has_skill(skill, level) for skill, level in skills_required.items())
-            and employee.is_available(start_time, duration)
-        ]
+        return self.employees_in(self.free_employees(
+            self.employee_candidates(required_mask),
+            calendar_minute(start_time), duration
+        ))
     
     def find_available_machines(self, machine_types: List[str], 
                                start_time: datetime, duration: int) -> List[Machine]:
-        return [
-            machine for machine in self.machines
-            if machine.machine_type in machine_types and machine.is_available(start_time, duration)
-        ]
+        return self.machines_in(self.free_machines(
+            self.machine_candidates(machine_types),
+            calendar_minute(start_time), duration
+        ))
     
-    def has_materials(self, materials_required: Dict[str, int]) -> bool:
-        return all(
-            material_id in self.inventory and 
-            self.inventory[material_id].quantity >= quantity
-            for material_id, quantity in materials_required.items()
-        )
+    def add_material(self, material: Material) -> None:
+        self.inventory[material.id] = material
+        self._step_materials.clear()
+        self.inventory_version += 1
+    
+    def _resolve_materials(self, step: ProductionStep) -> Optional[Tuple[Tuple[Material, int], ...]]:
+        """Resolve a step's material ids to inventory entries once; None if any is unstocked
+        
+        Entries are ordered scarcest first (largest share of current stock per unit)
+        so that a failing check usually stops at the first comparison.
+        """
+        if any(material_id not in self.inventory for material_id, _ in step.required_materials):
+            resolved = None
+        else:
+            resolved = tuple(sorted(
+                ((self.inventory[material_id], quantity)
+                 for material_id, quantity in step.required_materials),
+                key=lambda pair: pair[1] / pair[0].quantity if pair[0].quantity > 0 else float("inf"),
+                reverse=True
+            ))
+        self._step_materials[step.id] = resolved
+        return resolved
+    
+    def has_materials(self, step: ProductionStep) -> bool:
+        if step.id in self._step_materials:
+            required = self._step_materials[step.id]
+        else:
+            required = self._resolve_materials(step)
+        if required is None:
+            return False
+        return all(material.quantity >= quantity for material, quantity in required)
 
 class ProductionScheduler:
     def __init__(self, resource_scheduler: ResourceScheduler, event_bus: EventBus):
@@ -191,46 +467,73 @@ class ProductionScheduler:
     
     def schedule_order(self, order: Order) -> bool:
         # A simple scheduling algorithm (rough sketch)
-        current_time = datetime.now()
+        order.scheduled_at = datetime.now()
+        base_minute = calendar_minute(order.scheduled_at)
+        offset = 0  # minutes from scheduled_at to the end of the last scheduled step; the next may start later
+        records = order.task_records
+        first_record = len(records)
+        resource_scheduler = self.resource_scheduler
+        
+        # Qualified resources don't change between bikes, so look them up once per step
+        step_candidates = [
+            (step, *resource_scheduler.step_candidates(step))
+            for step in order.bike_model.steps
+        ]
         
         for _ in range(order.quantity):  # For each bike in the order
-            for step in order.bike_model.steps:
+            for step_index, (step, employee_mask, machine_mask) in enumerate(step_candidates):
                 # Check material availability
-                if not self.resource_scheduler.has_materials(step.required_materials):
+                if not resource_scheduler.has_materials(step):
+                    del records[first_record:]
                     return False  # Can't schedule due to material shortage
                 
-                # Find available employees
-                employees = self.resource_scheduler.find_available_employees(
-                    step.required_skills, current_time, step.duration
-                )
-                if not employees:
-                    return False  # Can't schedule due to employee unavailability
-                
-                # Find available machines
-                machines = self.resource_scheduler.find_available_machines(
-                    step.required_machines, current_time, step.duration
+                # Find the earliest time a qualified employee and one machine of each type are free
+                slot = resource_scheduler.earliest_slot(
+                    employee_mask, machine_mask, step.required_machines, base_minute + offset, step.duration
                 )
-                if step.required_machines and not machines:
-                    return False  # Can't schedule due to machine unavailability
+                if slot is None:
+                    del records[first_record:]
+                    return False  # Can't schedule, no qualified employee or machine is in service
+                start_minute, employees, machines = slot
                 
-                # Schedule the task
-                end_time = current_time.replace(minute=current_time.minute + step.duration)
-                task = ScheduledTask(
-                    step=step,
-                    start_time=current_time,
-                    end_time=end_time,
-                    assigned_employees=employees[:1],  # Just take the first available employee
-                    assigned_machines=machines
-                )
-                order.tasks.append(task)
-                
-                # Update time for next step
-                current_time = end_time
+                # Schedule the task, taking the first available employee
+                start = start_minute - base_minute
+                end = start + step.duration
+                records.append((step_index, start, end, (employees & -employees).bit_length() - 1, machines))
+                offset = end
+        
+        # Book the chosen resources only once the whole order fits, so a failed attempt holds nothing
+        for _, start, end, employee_index, machines in records[first_record:]:
+            resource_scheduler.reserve(employee_index, machines, base_minute + start, end - start)
         
         # If we got here, scheduling was successful
         order.status = OrderStatus.SCHEDULED
         self.event_bus.publish(Event("order_scheduled", {"order_id": order.id}))
         return True
+    
+    def build_tasks(self, order: Order) -> List[ScheduledTask]:
+        """Expand an order's task records into ScheduledTask objects for reporting"""
+        if len(order.tasks) != len(order.task_records):
+            resource_scheduler = self.resource_scheduler
+            steps = order.bike_model.steps
+            base_time = order.scheduled_at
+            current_time, current_offset = base_time, 0
+            tasks = []
+            for step_index, start, end, employee_index, machine_mask in order.task_records:
+                step = steps[step_index]
+                if start != current_offset:
+                    current_time = base_time + timedelta(minutes=start)
+                end_time = current_time + step._duration_td
+                tasks.append(ScheduledTask(
+                    step=step,
+                    start_time=current_time,
+                    end_time=end_time,
+                    assigned_employees=[resource_scheduler.employees[employee_index]],
+                    assigned_machines=resource_scheduler.machines_in(machine_mask)
+                ))
+                current_time, current_offset = end_time, end
+            order.tasks = tasks
+        return order.tasks
 
 # === Factory Module ===
 class OrderHandler:
@@ -240,12 +543,10 @@ class OrderHandler:
         self.orders: Dict[str, Order] = {}
         
         # Subscribe to events
-        event_bus.subscribe("order_created", self)
+        event_bus.subscribe("order_created", self.on_order_created)
     
-    def handle(self, event: Event) -> None:
-        if event.type == "order_created":
-            order_id = event.data["order_id"]
-            self.process_new_order(self.orders[order_id])
+    def on_order_created(self, event: Event) -> None:
+        self.process_new_order(self.orders[event.data["order_id"]])
     
     def create_order(self, customer: str, bike_model: BikeModel, quantity: int, due_date: datetime) -> Order:
         order = Order.create(customer, bike_model, quantity, due_date)
@@ -277,17 +578,23 @@ class BikeFactory:
         self.order_handler = OrderHandler(self.production_scheduler, self.event_bus)
     
     def add_employee(self, employee: Employee) -> None:
-        self.employees.append(employee)
+        self.resource_scheduler.add_employee(employee)
     
     def add_machine(self, machine: Machine) -> None:
-        self.machines.append(machine)
+        self.resource_scheduler.add_machine(machine)
     
     def add_material(self, material: Material) -> None:
-        self.inventory[material.id] = material
+        self.resource_scheduler.add_material(material)
     
     def add_bike_model(self, model: BikeModel) -> None:
         self.bike_models[model.id] = model
     
+    def finalize(self) -> None:
+        """Precompute qualified resources for every bike model step once the roster is complete"""
+        for model in self.bike_models.values():
+            for step in model.steps:
+                self.resource_scheduler.step_candidates(step)
+    
     def create_order(self, customer: str, bike_model_id: str, quantity: int, due_date: datetime) -> Optional[Order]:
         if bike_model_id not in self.bike_models:
             return None
@@ -299,608 +606,820 @@ class BikeFactory:
             due_date
         )
 
+# === Sample Factory ===
+@dataclass(frozen=True, slots=True)
+class FactoryConfig:
+    """Static description of a factory; build_factory_from_config creates the mutable parts per run"""
+    name: str
+    employee_skills: Tuple[Dict[Skill, SkillLevel], ...]
+    machines: Tuple[Tuple[str, str, str, Dict[Skill, SkillLevel], int, float], ...]
+    materials: Tuple[Tuple[str, str, int, str, float], ...]
+    bike_models: Tuple[BikeModel, ...]
+
+# Employees with realistic skills
+_SAMPLE_EMPLOYEE_SKILLS = (
+    # Welders
+    {Skill.FRAME_WELDING: SkillLevel.EXPERT, Skill.TUBE_CUTTING: SkillLevel.ADVANCED, Skill.MAINTENANCE: SkillLevel.INTERMEDIATE},
+    {Skill.FRAME_WELDING: SkillLevel.ADVANCED, Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE},
+    
+    # Assemblers
+    {Skill.COMPONENT_ASSEMBLY: SkillLevel.EXPERT, Skill.WHEEL_BUILDING: SkillLevel.ADVANCED},
+    {Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED, Skill.SUSPENSION_TUNING: SkillLevel.EXPERT},
+    {Skill.COMPONENT_ASSEMBLY: SkillLevel.INTERMEDIATE, Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE},
+    
+    # Painters
+    {Skill.PAINTING: SkillLevel.EXPERT},
+    {Skill.PAINTING: SkillLevel.ADVANCED, Skill.MAINTENANCE: SkillLevel.NOVICE},
+    
+    # Specialists
+    {Skill.WHEEL_BUILDING: SkillLevel.EXPERT, Skill.COMPONENT_ASSEMBLY: SkillLevel.INTERMEDIATE},
+    {Skill.ELECTRONICS: SkillLevel.EXPERT, Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
+    {Skill.MACHINING: SkillLevel.EXPERT, Skill.MAINTENANCE: SkillLevel.ADVANCED},
+    
+    # QA/QC
+    {Skill.QUALITY_CONTROL: SkillLevel.EXPERT, Skill.SUSPENSION_TUNING: SkillLevel.ADVANCED},
+    {Skill.QUALITY_CONTROL: SkillLevel.ADVANCED, Skill.WHEEL_BUILDING: SkillLevel.INTERMEDIATE}
+)
+
+# Realistic machines with meaningful parameters
+_SAMPLE_MACHINES = (
+    # Frame preparation
+    ("tube_cutter", "Tube Cutting Machine", "CuttingMachine", 
+     {Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE}, 2400, 0.01),
+    ("cnc_mill", "CNC Milling Machine", "CNCMachine", 
+     {Skill.MACHINING: SkillLevel.ADVANCED}, 1800, 0.02),
+    
+    # Welding
+    ("tig_welder_1", "TIG Welding Station 1", "WeldingStation", 
+     {Skill.FRAME_WELDING: SkillLevel.INTERMEDIATE}, 2400, 0.01),
+    ("tig_welder_2", "TIG Welding Station 2", "WeldingStation", 
+     {Skill.FRAME_WELDING: SkillLevel.INTERMEDIATE}, 2400, 0.01),
+    
+    # Wheel building
+    ("wheel_truing_stand_1", "Wheel Truing Stand 1", "WheelStation", 
+     {Skill.WHEEL_BUILDING: SkillLevel.INTERMEDIATE}, 4800, 0.005),
+    ("wheel_truing_stand_2", "Wheel Truing Stand 2", "WheelStation", 
+     {Skill.WHEEL_BUILDING: SkillLevel.INTERMEDIATE}, 4800, 0.005),
+    
+    # Assembly
+    ("assembly_station_1", "Bike Assembly Station 1", "AssemblyStation", 
+     {Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE}, 4800, 0.005),
+    ("assembly_station_2", "Bike Assembly Station 2", "AssemblyStation", 
+     {Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE}, 4800, 0.005),
+    ("assembly_station_3", "Bike Assembly Station 3", "AssemblyStation", 
+     {Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE}, 4800, 0.005),
+    
+    # Painting
+    ("paint_booth_1", "Paint Booth 1", "PaintBooth", 
+     {Skill.PAINTING: SkillLevel.INTERMEDIATE}, 1200, 0.02),
+    ("paint_booth_2", "Paint Booth 2", "PaintBooth", 
+     {Skill.PAINTING: SkillLevel.INTERMEDIATE}, 1200, 0.02),
+    
+    # Special equipment
+    ("suspension_dyno", "Suspension Dynamometer", "TestingEquipment", 
+     {Skill.SUSPENSION_TUNING: SkillLevel.ADVANCED}, 2400, 0.01),
+    ("electronics_bench", "Electronics Workbench", "ElectronicsStation", 
+     {Skill.ELECTRONICS: SkillLevel.INTERMEDIATE}, 3600, 0.01),
+    
+    # Quality control
+    ("qa_stand_1", "Quality Assurance Station 1", "QAStation", 
+     {Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE}, 4800, 0.005),
+    ("qa_stand_2", "Quality Assurance Station 2", "QAStation", 
+     {Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE}, 4800, 0.005)
+)
+
+# Realistic materials
+_SAMPLE_MATERIALS = (
+    # Frame materials
+    ("aluminum_tube", "Aluminum Tubing", 500, "frame_storage", 8.50),
+    ("carbon_tube", "Carbon Fiber Tubing", 200, "frame_storage", 22.75),
+    ("steel_tube", "Chromoly Steel Tubing", 300, "frame_storage", 5.25),
+    
+    # Components
+    ("handlebar", "Handlebars", 150, "components", 12.00),
+    ("stem", "Stems", 150, "components", 8.50),
+    ("seat_post", "Seat Posts", 150, "components", 9.25),
+    ("saddle", "Saddles", 150, "components", 15.00),
+    ("front_derailleur", "Front Derailleurs", 100, "components", 18.50),
+    ("rear_derailleur", "Rear Derailleurs", 100, "components", 25.00),
+    ("brake_set", "Hydraulic Brake Sets", 100, "components", 45.00),
+    ("chain", "Chains", 200, "components", 12.00),
+    ("cassette", "Cassettes", 100, "components", 22.00),
+    ("bottom_bracket", "Bottom Brackets", 100, "components", 15.00),
+    ("crankset", "Cranksets", 100, "components", 35.00),
+    
+    # Wheels
+    ("rim", "Wheel Rims", 300, "wheel_storage", 18.00),
+    ("hub", "Wheel Hubs", 300, "wheel_storage", 22.00),
+    ("spoke", "Wheel Spokes (pack)", 1000, "wheel_storage", 0.50),
+    ("tire", "Tires", 300, "wheel_storage", 25.00),
+    ("tube", "Inner Tubes", 400, "wheel_storage", 5.00),
+    
+    # Suspension
+    ("fork", "Front Forks", 80, "suspension", 120.00),
+    ("rear_shock", "Rear Shocks", 50, "suspension", 85.00),
+    
+    # Electronics
+    ("motor", "E-Bike Motors", 30, "electronics", 150.00),
+    ("battery", "Lithium Batteries", 30, "electronics", 200.00),
+    ("controller", "Motor Controllers", 30, "electronics", 45.00),
+    ("display", "Digital Displays", 30, "electronics", 35.00),
+    
+    # Finishing
+    ("paint", "Paint (liter)", 200, "paint_storage", 12.00),
+    ("clear_coat", "Clear Coat (liter)", 150, "paint_storage", 15.00),
+    ("decal", "Decal Sets", 100, "paint_storage", 8.00),
+    
+    # Packaging
+    ("box", "Shipping Boxes", 100, "packaging", 3.50),
+    ("manual", "User Manuals", 200, "packaging", 1.25),
+    ("toolkit", "Basic Tool Kits", 100, "packaging", 8.00)
+)
+
+def _build_sample_bike_models() -> Tuple[BikeModel, ...]:
+    """Create realistic production steps and bike models for different bike types"""
+    # Mountain Bike Steps
+    mtb_frame_prep = ProductionStep(
+        id="mtb_step1",
+        name="Mountain Bike Frame Tube Preparation",
+        required_skills={Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE},
+        required_machines=["CuttingMachine"],
+        required_materials={"aluminum_tube": 5},
+        duration=45,
+        quality_factor=0.9
+    )
+    
+    mtb_frame_welding = ProductionStep(
+        id="mtb_step2",
+        name="Mountain Bike Frame Welding",
+        required_skills={Skill.FRAME_WELDING: SkillLevel.ADVANCED},
+        required_machines=["WeldingStation"],
+        required_materials={},  # Already accounted for in tube prep
+        duration=90,
+        quality_factor=1.2
+    )
+    
+    mtb_suspension_prep = ProductionStep(
+        id="mtb_step3",
+        name="Mountain Bike Suspension Installation",
+        required_skills={Skill.SUSPENSION_TUNING: SkillLevel.INTERMEDIATE},
+        required_machines=["AssemblyStation"],
+        required_materials={"fork": 1, "rear_shock": 1},
+        duration=60,
+        quality_factor=1.1
+    )
+    
+    mtb_wheel_building = ProductionStep(
+        id="mtb_step4",
+        name="Mountain Bike Wheel Building",
+        required_skills={Skill.WHEEL_BUILDING: SkillLevel.ADVANCED},
+        required_machines=["WheelStation"],
+        required_materials={"rim": 2, "hub": 2, "spoke": 2, "tire": 2, "tube": 2},
+        duration=75,
+        quality_factor=1.0
+    )
+    
+    mtb_assembly = ProductionStep(
+        id="mtb_step5",
+        name="Mountain Bike Component Assembly",
+        required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.INTERMEDIATE},
+        required_machines=["AssemblyStation"],
+        required_materials={
+            "handlebar": 1, "stem": 1, "seat_post": 1, "saddle": 1, 
+            "front_derailleur": 1, "rear_derailleur": 1, "brake_set": 1,
+            "chain": 1, "cassette": 1, "bottom_bracket": 1, "crankset": 1
+        },
+        duration=120,
+        quality_factor=1.0
+    )
+    
+    mtb_paint = ProductionStep(
+        id="mtb_step6",
+        name="Mountain Bike Painting",
+        required_skills={Skill.PAINTING: SkillLevel.INTERMEDIATE},
+        required_machines=["PaintBooth"],
+        required_materials={"paint": 2, "clear_coat": 1, "decal": 1},
+        duration=90,
+        quality_factor=0.9
+    )
+    
+    mtb_qa = ProductionStep(
+        id="mtb_step7",
+        name="Mountain Bike Quality Assurance",
+        required_skills={Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE},
+        required_machines=["QAStation"],
+        required_materials={},
+        duration=30,
+        quality_factor=1.5
+    )
+    
+    mtb_packaging = ProductionStep(
+        id="mtb_step8",
+        name="Mountain Bike Packaging",
+        required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE},
+        required_machines=[],
+        required_materials={"box": 1, "manual": 1, "toolkit": 1},
+        duration=20,
+        quality_factor=0.7
+    )
+    
+    # Road Bike Steps
+    road_frame_prep = ProductionStep(
+        id="road_step1",
+        name="Road Bike Frame Tube Preparation",
+        required_skills={Skill.TUBE_CUTTING: SkillLevel.ADVANCED, Skill.MACHINING: SkillLevel.INTERMEDIATE},
+        required_machines=["CuttingMachine", "CNCMachine"],
+        required_materials={"carbon_tube": 5},
+        duration=60,
+        quality_factor=1.2
+    )
+    
+    road_frame_assembly = ProductionStep(
+        id="road_step2",
+        name="Road Bike Frame Assembly",
+        required_skills={Skill.FRAME_WELDING: SkillLevel.EXPERT, Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
+        required_machines=["AssemblyStation"],
+        required_materials={},
+        duration=100,
+        quality_factor=1.3
+    )
+    
+    road_wheel_building = ProductionStep(
+        id="road_step3",
+        name="Road Bike Wheel Building",
+        required_skills={Skill.WHEEL_BUILDING: SkillLevel.EXPERT},
+        required_machines=["WheelStation"],
+        required_materials={"rim": 2, "hub": 2, "spoke": 2, "tire": 2, "tube": 2},
+        duration=90,
+        quality_factor=1.2
+    )
+    
+    road_assembly = ProductionStep(
+        id="road_step4",
+        name="Road Bike Component Assembly",
+        required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
+        required_machines=["AssemblyStation"],
+        required_materials={
+            "handlebar": 1, "stem": 1, "seat_post": 1, "saddle": 1, 
+            "front_derailleur": 1, "rear_derailleur": 1, "brake_set": 1,
+            "chain": 1, "cassette": 1, "bottom_bracket": 1, "crankset": 1
+        },
+        duration=90,
+        quality_factor=1.1
+    )
+    
+    road_paint = ProductionStep(
+        id="road_step5",
+        name="Road Bike Painting and Finishing",
+        required_skills={Skill.PAINTING: SkillLevel.EXPERT},
+        required_machines=["PaintBooth"],
+        required_materials={"paint": 1, "clear_coat": 2, "decal": 1},
+        duration=120,
+        quality_factor=1.2
+    )
+    
+    road_qa = ProductionStep(
+        id="road_step6",
+        name="Road Bike Quality Assurance",
+        required_skills={Skill.QUALITY_CONTROL: SkillLevel.EXPERT},
+        required_machines=["QAStation"],
+        required_materials={},
+        duration=45,
+        quality_factor=1.5
+    )
+    
+    road_packaging = ProductionStep(
+        id="road_step7",
+        name="Road Bike Packaging",
+        required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE},
+        required_machines=[],
+        required_materials={"box": 1, "manual": 1, "toolkit": 1},
+        duration=20,
+        quality_factor=0.7
+    )
+    
+    # Electric Bike Steps
+    ebike_frame_prep = ProductionStep(
+        id="ebike_step1",
+        name="E-Bike Frame Preparation",
+        required_skills={Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE, Skill.MACHINING: SkillLevel.INTERMEDIATE},
+        required_machines=["CuttingMachine", "CNCMachine"],
+        required_materials={"aluminum_tube": 6},
+        duration=60,
+        quality_factor=1.0
+    )
+    
+    ebike_frame_welding = ProductionStep(
+        id="ebike_step2",
+        name="E-Bike Frame Welding",
+        required_skills={Skill.FRAME_WELDING: SkillLevel.ADVANCED},
+        required_machines=["WeldingStation"],
+        required_materials={},
+        duration=100,
+        quality_factor=1.1
+    )
+    
+    ebike_electronics = ProductionStep(
+        id="ebike_step3",
+        name="E-Bike Electronics Installation",
+        required_skills={Skill.ELECTRONICS: SkillLevel.ADVANCED},
+        required_machines=["ElectronicsStation"],
+        required_materials={"motor": 1, "battery": 1, "controller": 1, "display": 1},
+        duration=90,
+        quality_factor=1.3
+    )
+    
+    ebike_wheel_building = ProductionStep(
+        id="ebike_step4",
+        name="E-Bike Wheel Building",
+        required_skills={Skill.WHEEL_BUILDING: SkillLevel.ADVANCED},
+        required_machines=["WheelStation"],
+        required_materials={"rim": 2, "hub": 2, "spoke": 2, "tire": 2, "tube": 2},
+        duration=60,
+        quality_factor=1.0
+    )
+    
+    ebike_assembly = ProductionStep(
+        id="ebike_step5",
+        name="E-Bike Component Assembly",
+        required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
+        required_machines=["AssemblyStation"],
+        required_materials={
+            "handlebar": 1, "stem": 1, "seat_post": 1, "saddle": 1, 
+            "front_derailleur": 1, "rear_derailleur": 1, "brake_set": 1,
+            "chain": 1, "cassette": 1, "bottom_bracket": 1, "crankset": 1
+        },
+        duration=120,
+        quality_factor=1.0
+    )
+    
+    ebike_paint = ProductionStep(
+        id="ebike_step6",
+        name="E-Bike Painting",
+        required_skills={Skill.PAINTING: SkillLevel.INTERMEDIATE},
+        required_machines=["PaintBooth"],
+        required_materials={"paint": 2, "clear_coat": 1, "decal": 1},
+        duration=90,
+        quality_factor=0.9
+    )
+    
+    ebike_electronics_testing = ProductionStep(
+        id="ebike_step7",
+        name="E-Bike Electronics Testing",
+        required_skills={Skill.ELECTRONICS: SkillLevel.EXPERT, Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE},
+        required_machines=["QAStation", "ElectronicsStation"],
+        required_materials={},
+        duration=45,
+        quality_factor=1.4
+    )
+    
+    ebike_qa = ProductionStep(
+        id="ebike_step8",
+        name="E-Bike Quality Assurance",
+        required_skills={Skill.QUALITY_CONTROL: SkillLevel.ADVANCED},
+        required_machines=["QAStation"],
+        required_materials={},
+        duration=30,
+        quality_factor=1.2
+    )
+    
+    ebike_packaging = ProductionStep(
+        id="ebike_step9",
+        name="E-Bike Packaging",
+        required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE},
+        required_machines=[],
+        required_materials={"box": 1, "manual": 1, "toolkit": 1},
+        duration=25,
+        quality_factor=0.7
+    )
+    
+    # Create bike models
+    mountain_bike = BikeModel(
+        id="mountain",
+        name="Trail Crusher Mountain Bike",
+        type="mountain",
+        steps=[mtb_frame_prep, mtb_frame_welding, mtb_suspension_prep, 
+               mtb_wheel_building, mtb_assembly, mtb_paint, mtb_qa, mtb_packaging],
+        base_price=899.99
+    )
+    
+    road_bike = BikeModel(
+        id="road",
+        name="Speed Demon Road Bike",
+        type="road",
+        steps=[road_frame_prep, road_frame_assembly, road_wheel_building, 
+               road_assembly, road_paint, road_qa, road_packaging],
+        base_price=1299.99
+    )
+    
+    electric_bike = BikeModel(
+        id="electric",
+        name="PowerGlide Electric Bike",
+        type="electric",
+        steps=[ebike_frame_prep, ebike_frame_welding, ebike_electronics, 
+               ebike_wheel_building, ebike_assembly, ebike_paint, 
+               ebike_electronics_testing, ebike_qa, ebike_packaging],
+        base_price=1899.99
+    )
+    
+    return (mountain_bike, road_bike, electric_bike)
+
+_SAMPLE_CONFIG = FactoryConfig(
+    name="Advanced Bike Factory",
+    employee_skills=_SAMPLE_EMPLOYEE_SKILLS,
+    machines=_SAMPLE_MACHINES,
+    materials=_SAMPLE_MATERIALS,
+    bike_models=_build_sample_bike_models()
+)
+
+def build_factory_from_config(config: FactoryConfig) -> BikeFactory:
+    """Build a factory with fresh employees, machines and inventory; bike models are shared"""
+    factory = BikeFactory(config.name)
+    
+    for i, skills in enumerate(config.employee_skills):
+        factory.add_employee(Employee(
+            id=f"emp-{i+1}",
+            name=f"Employee {i+1}",
+            skills=skills,
+            hourly_rate=20.0 + (sum(level.value for level in skills.values()) * 1.5)  # Higher skills = higher pay
+        ))
+    
+    for machine_id, name, machine_type, skills_required, maintenance_interval, failure_rate in config.machines:
+        factory.add_machine(Machine(
+            id=machine_id,
+            name=name,
+            machine_type=machine_type,
+            skills_required=skills_required,
+            maintenance_interval=maintenance_interval,
+            failure_rate=failure_rate
+        ))
+    
+    for material_id, name, quantity, location, unit_cost in config.materials:
+        factory.add_material(Material(
+            id=material_id,
+            name=name,
+            quantity=quantity,
+            location=location,
+            unit_cost=unit_cost
+        ))
+    
+    for model in config.bike_models:
+        factory.add_bike_model(model)
+    
+    factory.finalize()
+    return factory
+
 # === SimPy Simulation ===
+def _compute_stats(times: List[float]) -> Dict[str, float]:
+    """Mean, standard deviation and nearest-rank percentiles of a sample, from one sort"""
+    n = len(times)
+    if n == 0:
+        return {"mean": 0.0, "std": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(times)
+    mean = math.fsum(ordered) / n
+    variance = math.fsum((t - mean) ** 2 for t in ordered) / n
+    return {
+        "mean": mean,
+        "std": math.sqrt(variance),
+        "p50": ordered[math.ceil(0.50 * n) - 1],
+        "p95": ordered[math.ceil(0.95 * n) - 1],
+        "max": ordered[-1],
+    }
+
+def _record_bikes(stats: "SimulationStats", lead_times: array.array, count: int, step_minutes: int, lead_time: float) -> None:
+    """Add count finished bikes, each with step_minutes of work, to the run's counters"""
+    stats.bikes_produced += count
+    stats.total_production_time += step_minutes * count
+    for _ in range(count):
+        lead_times.append(lead_time)
+
+class StepPlan(NamedTuple):
+    """A production step with the simulation resources it holds, ready to unpack"""
+    name: str
+    duration: int
+    pool: simpy.PriorityResource
+    machines: Tuple[simpy.PriorityResource, ...]
+
+_MAX_ORDER_QUANTITY = 5  # bikes per generated order
+
+# Simulation log records are (time, kind, *fields); formatted only when written out
+_LOG_FORMATS = {
+    "order_received": "{0}: Received order {1} for {2} {3}(s)",
+    "order_cancelled": "{0}: Order {1} cancelled due to insufficient materials",
+    "order_completed": "{0}: Completed order {1}",
+    "step_done": "{0}: Completed {3} for order {1}, bike {2}",
+    "bike_done": "{0}: Completed bike {2} for order {1}",
+    "batch_step_done": "{0}: Completed {3} for order {1}, bikes 1-{2}",
+    "batch_done": "{0}: Completed bikes 1-{2} for order {1}",
+}
+
+@dataclass(slots=True)
+class SimulationStats:
+    orders_received: int = 0
+    orders_completed: int = 0
+    orders_cancelled: int = 0
+    bikes_produced: int = 0
+    total_production_time: int = 0
+    machine_breakdowns: int = 0
+    maintenance_events: int = 0
+    quality_scores: List[float] = field(default_factory=list)
+    # Filled in at the end of run_simulation
+    avg_production_time: float = 0.0
+    lead_time_mean: float = 0.0
+    lead_time_std: float = 0.0
+    lead_time_p50: float = 0.0
+    lead_time_p95: float = 0.0
+    lead_time_max: float = 0.0
+    step_time_mean: float = 0.0
+    step_time_std: float = 0.0
+    step_time_p50: float = 0.0
+    step_time_p95: float = 0.0
+    step_time_max: float = 0.0
+
 class FactorySimulation:
-    def __init__(self, env: simpy.Environment):
+    def __init__(self, env: simpy.Environment, verbose: bool = False, seed: Optional[int] = None):
         self.env = env
+        # All randomness in a run comes from this generator, so equal seeds replay equal runs
+        self._rng = random.Random(seed)
+        self.verbose = verbose  # write the event log to stdout at the end of run_simulation
+        self._log: List[Tuple] = []
+        self._lead_times = array.array('d')  # minutes from production start to completion, per bike
+        self._step_times = array.array('d')  # minutes from requesting a step's resources to finishing it
+        self._step_count = 0  # filled prefix of _step_times, which run_simulation preallocates
         self.factory = self.create_sample_factory()
+        self.batch_production = True  # run each order's bikes through the steps together
         self.human_resources = {}  # Resources by skill
         self.machine_resources = {}
-        self.simulation_stats = {
-            "orders_received": 0,
-            "orders_completed": 0,
-            "orders_cancelled": 0,
-            "bikes_produced": 0,
-            "total_production_time": 0,
-            "machine_breakdowns": 0,
-            "maintenance_events": 0,
-            "quality_scores": []
-        }
+        self.stats = SimulationStats()
         
-        # Create resources for each skill
-        for skill in Skill:
-            skilled_employees = sum(1 for e in self.factory.employees if skill in e.skills)
-            self.human_resources[skill] = simpy.Resource(env, capacity=skilled_employees)
+        # Create resources for each skill held by at least one employee
+        skill_counts = Counter()
+        for employee in self.factory.employees:
+            skill_counts.update(employee.skills.keys())
+        for skill, skilled_employees in skill_counts.items():
+            self.human_resources[skill] = simpy.PriorityResource(env, capacity=skilled_employees)
         
         # Create resources for each machine type
-        machine_types = set(machine.machine_type for machine in self.factory.machines)
-        for machine_type in machine_types:
-            machines_of_type = sum(1 for m in self.factory.machines if m.machine_type == machine_type)
-            self.machine_resources[machine_type] = simpy.Resource(env, capacity=machines_of_type)
+        machine_counts = Counter(machine.machine_type for machine in self.factory.machines)
+        for machine_type, machines_of_type in machine_counts.items():
+            self.machine_resources[machine_type] = simpy.PriorityResource(env, capacity=machines_of_type)
+        
+        # Bike models are shared between factories, so each simulation keeps its own plans
+        self._plans: Dict[str, Tuple[StepPlan, ...]] = {
+            model.id: tuple(self._plan_step(step) for step in model.steps)
+            for model in self.factory.bike_models.values()
+        }
+        # Largest per-bike quantity of any one material, per model
+        self._peak_need: Dict[str, int] = {
+            model.id: max(model.materials_per_unit.values(), default=0)
+            for model in self.factory.bike_models.values()
+        }
+        # (model id, inventory version, lowest stock left among that model's materials)
+        # after the last reservation
+        self._low_water: Tuple[Optional[str], int, float] = (None, -1, 0.0)
+    
+    def _plan_step(self, step: ProductionStep) -> StepPlan:
+        """Resolve a step's employee pool and machine resources"""
+        machines = tuple(
+            self.machine_resources[machine_type]
+            for machine_type in step.required_machines
+            if machine_type in self.machine_resources
+        )
+        return StepPlan(step.name, step.duration, self._primary_pool(step), machines)
+    
+    def _primary_pool(self, step: ProductionStep) -> simpy.PriorityResource:
+        """The employee pool for a step's most demanding skill"""
+        if not step.required_skills:
+            raise ValueError(f"Step {step.id} requires no skills to staff it")
+        skill, level = max(step.required_skills, key=lambda item: item[1])
+        # The factory's scheduler already keeps every employee's skill mask
+        if not self.factory.resource_scheduler.employee_candidates(skill_mask(((skill, level),))):
+            raise ValueError(f"No employee has {skill.name} at {level.name} level for step {step.id}")
+        return self.human_resources[skill]
     
     def create_sample_factory(self) -> BikeFactory:
         # Create a sample factory with employees, machines, materials, and bike models
-        factory = BikeFactory("Advanced Bike Factory")
-        
-        # Add employees with realistic skills
-        employee_skills = [
-            # Welders
-            {Skill.FRAME_WELDING: SkillLevel.EXPERT, Skill.TUBE_CUTTING: SkillLevel.ADVANCED, Skill.MAINTENANCE: SkillLevel.INTERMEDIATE},
-            {Skill.FRAME_WELDING: SkillLevel.ADVANCED, Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE},
-            
-            # Assemblers
-            {Skill.COMPONENT_ASSEMBLY: SkillLevel.EXPERT, Skill.WHEEL_BUILDING: SkillLevel.ADVANCED},
-            {Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED, Skill.SUSPENSION_TUNING: SkillLevel.EXPERT},
-            {Skill.COMPONENT_ASSEMBLY: SkillLevel.INTERMEDIATE, Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE},
-            
-            # Painters
-            {Skill.PAINTING: SkillLevel.EXPERT},
-            {Skill.PAINTING: SkillLevel.ADVANCED, Skill.MAINTENANCE: SkillLevel.NOVICE},
-            
-            # Specialists
-            {Skill.WHEEL_BUILDING: SkillLevel.EXPERT, Skill.COMPONENT_ASSEMBLY: SkillLevel.INTERMEDIATE},
-            {Skill.ELECTRONICS: SkillLevel.EXPERT, Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
-            {Skill.MACHINING: SkillLevel.EXPERT, Skill.MAINTENANCE: SkillLevel.ADVANCED},
-            
-            # QA/QC
-            {Skill.QUALITY_CONTROL: SkillLevel.EXPERT, Skill.SUSPENSION_TUNING: SkillLevel.ADVANCED},
-            {Skill.QUALITY_CONTROL: SkillLevel.ADVANCED, Skill.WHEEL_BUILDING: SkillLevel.INTERMEDIATE}
-        ]
-        
-        for i, skills in enumerate(employee_skills):
-            factory.add_employee(Employee(
-                id=f"emp-{i+1}",
-                name=f"Employee {i+1}",
-                skills=skills,
-                hourly_rate=20.0 + (sum(level.value for level in skills.values()) * 1.5)  # Higher skills = higher pay
-            ))
-        
-        # Add realistic machines with meaningful parameters
-        machines = [
-            # Frame preparation
-            ("tube_cutter", "Tube Cutting Machine", "CuttingMachine", 
-             {Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE}, 2400, 0.01),
-            ("cnc_mill", "CNC Milling Machine", "CNCMachine", 
-             {Skill.MACHINING: SkillLevel.ADVANCED}, 1800, 0.02),
-            
-            # Welding
-            ("tig_welder_1", "TIG Welding Station 1", "WeldingStation", 
-             {Skill.FRAME_WELDING: SkillLevel.INTERMEDIATE}, 2400, 0.01),
-            ("tig_welder_2", "TIG Welding Station 2", "WeldingStation", 
-             {Skill.FRAME_WELDING: SkillLevel.INTERMEDIATE}, 2400, 0.01),
-            
-            # Wheel building
-            ("wheel_truing_stand_1", "Wheel Truing Stand 1", "WheelStation", 
-             {Skill.WHEEL_BUILDING: SkillLevel.INTERMEDIATE}, 4800, 0.005),
-            ("wheel_truing_stand_2", "Wheel Truing Stand 2", "WheelStation", 
-             {Skill.WHEEL_BUILDING: SkillLevel.INTERMEDIATE}, 4800, 0.005),
-            
-            # Assembly
-            ("assembly_station_1", "Bike Assembly Station 1", "AssemblyStation", 
-             {Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE}, 4800, 0.005),
-            ("assembly_station_2", "Bike Assembly Station 2", "AssemblyStation", 
-             {Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE}, 4800, 0.005),
-            ("assembly_station_3", "Bike Assembly Station 3", "AssemblyStation", 
-             {Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE}, 4800, 0.005),
-            
-            # Painting
-            ("paint_booth_1", "Paint Booth 1", "PaintBooth", 
-             {Skill.PAINTING: SkillLevel.INTERMEDIATE}, 1200, 0.02),
-            ("paint_booth_2", "Paint Booth 2", "PaintBooth", 
-             {Skill.PAINTING: SkillLevel.INTERMEDIATE}, 1200, 0.02),
-            
-            # Special equipment
-            ("suspension_dyno", "Suspension Dynamometer", "TestingEquipment", 
-             {Skill.SUSPENSION_TUNING: SkillLevel.ADVANCED}, 2400, 0.01),
-            ("electronics_bench", "Electronics Workbench", "ElectronicsStation", 
-             {Skill.ELECTRONICS: SkillLevel.INTERMEDIATE}, 3600, 0.01),
-            
-            # Quality control
-            ("qa_stand_1", "Quality Assurance Station 1", "QAStation", 
-             {Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE}, 4800, 0.005),
-            ("qa_stand_2", "Quality Assurance Station 2", "QAStation", 
-             {Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE}, 4800, 0.005)
-        ]
+        return build_factory_from_config(_SAMPLE_CONFIG)
+    
+    def _run_step(self, pool: simpy.PriorityResource, needed_machines: Tuple[simpy.PriorityResource, ...],
+                  work_time: int, priority: float) -> Any:
+        """Hold a step's employee pool and machine resources for work_time minutes
         
-        for machine_id, name, machine_type, skills_required, maintenance_interval, failure_rate in machines:
-            factory.add_machine(Machine(
-                id=machine_id,
-                name=name,
-                machine_type=machine_type,
-                skills_required=skills_required,
-                maintenance_interval=maintenance_interval,
-                failure_rate=failure_rate
-            ))
+        Requests queue by priority, so the order due soonest gets freed resources first.
+        """
+        requested = self.env.now
         
-        # Add realistic materials
-        materials = [
-            # Frame materials
-            ("aluminum_tube", "Aluminum Tubing", 500, "frame_storage", 8.50),
-            ("carbon_tube", "Carbon Fiber Tubing", 200, "frame_storage", 22.75),
-            ("steel_tube", "Chromoly Steel Tubing", 300, "frame_storage", 5.25),
-            
-            # Components
-            ("handlebar", "Handlebars", 150, "components", 12.00),
-            ("stem", "Stems", 150, "components", 8.50),
-            ("seat_post", "Seat Posts", 150, "components", 9.25),
-            ("saddle", "Saddles", 150, "components", 15.00),
-            ("front_derailleur", "Front Derailleurs", 100, "components", 18.50),
-            ("rear_derailleur", "Rear Derailleurs", 100, "components", 25.00),
-            ("brake_set", "Hydraulic Brake Sets", 100, "components", 45.00),
-            ("chain", "Chains", 200, "components", 12.00),
-            ("cassette", "Cassettes", 100, "components", 22.00),
-            ("bottom_bracket", "Bottom Brackets", 100, "components", 15.00),
-            ("crankset", "Cranksets", 100, "components", 35.00),
-            
-            # Wheels
-            ("rim", "Wheel Rims", 300, "wheel_storage", 18.00),
-            ("hub", "Wheel Hubs", 300, "wheel_storage", 22.00),
-            ("spoke", "Wheel Spokes (pack)", 1000, "wheel_storage", 0.50),
-            ("tire", "Tires", 300, "wheel_storage", 25.00),
-            ("tube", "Inner Tubes", 400, "wheel_storage", 5.00),
-            
-            # Suspension
-            ("fork", "Front Forks", 80, "suspension", 120.00),
-            ("rear_shock", "Rear Shocks", 50, "suspension", 85.00),
+        # Request employee(s)
+        with pool.request(priority=priority) as employee_request:
+            yield employee_request
             
-            # Electronics
-            ("motor", "E-Bike Motors", 30, "electronics", 150.00),
-            ("battery", "Lithium Batteries", 30, "electronics", 200.00),
-            ("controller", "Motor Controllers", 30, "electronics", 45.00),
-            ("display", "Digital Displays", 30, "electronics", 35.00),
-            
-            # Finishing
-            ("paint", "Paint (liter)", 200, "paint_storage", 12.00),
-            ("clear_coat", "Clear Coat (liter)", 150, "paint_storage", 15.00),
-            ("decal", "Decal Sets", 100, "paint_storage", 8.00),
-            
-            # Packaging
-            ("box", "Shipping Boxes", 100, "packaging", 3.50),
-            ("manual", "User Manuals", 200, "packaging", 1.25),
-            ("toolkit", "Basic Tool Kits", 100, "packaging", 8.00)
-        ]
-        
-        for material_id, name, quantity, location, unit_cost in materials:
-            factory.add_material(Material(
-                id=material_id,
-                name=name,
-                quantity=quantity,
-                location=location,
-                unit_cost=unit_cost
-            ))
-        
-        # Create realistic production steps for different bike types
-        
-        # Mountain Bike Steps
-        mtb_frame_prep = ProductionStep(
-            id="mtb_step1",
-            name="Mountain Bike Frame Tube Preparation",
-            required_skills={Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE},
-            required_machines=["CuttingMachine"],
-            required_materials={"aluminum_tube": 5},
-            duration=45,
-            quality_factor=0.9
-        )
-        
-        mtb_frame_welding = ProductionStep(
-            id="mtb_step2",
-            name="Mountain Bike Frame Welding",
-            required_skills={Skill.FRAME_WELDING: SkillLevel.ADVANCED},
-            required_machines=["WeldingStation"],
-            required_materials={},  # Already accounted for in tube prep
-            duration=90,
-            quality_factor=1.2
-        )
-        
-        mtb_suspension_prep = ProductionStep(
-            id="mtb_step3",
-            name="Mountain Bike Suspension Installation",
-            required_skills={Skill.SUSPENSION_TUNING: SkillLevel.INTERMEDIATE},
-            required_machines=["AssemblyStation"],
-            required_materials={"fork": 1, "rear_shock": 1},
-            duration=60,
-            quality_factor=1.1
-        )
-        
-        mtb_wheel_building = ProductionStep(
-            id="mtb_step4",
-            name="Mountain Bike Wheel Building",
-            required_skills={Skill.WHEEL_BUILDING: SkillLevel.ADVANCED},
-            required_machines=["WheelStation"],
-            required_materials={"rim": 2, "hub": 2, "spoke": 2, "tire": 2, "tube": 2},
-            duration=75,
-            quality_factor=1.0
-        )
-        
-        mtb_assembly = ProductionStep(
-            id="mtb_step5",
-            name="Mountain Bike Component Assembly",
-            required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.INTERMEDIATE},
-            required_machines=["AssemblyStation"],
-            required_materials={
-                "handlebar": 1, "stem": 1, "seat_post": 1, "saddle": 1, 
-                "front_derailleur": 1, "rear_derailleur": 1, "brake_set": 1,
-                "chain": 1, "cassette": 1, "bottom_bracket": 1, "crankset": 1
-            },
-            duration=120,
-            quality_factor=1.0
-        )
-        
-        mtb_paint = ProductionStep(
-            id="mtb_step6",
-            name="Mountain Bike Painting",
-            required_skills={Skill.PAINTING: SkillLevel.INTERMEDIATE},
-            required_machines=["PaintBooth"],
-            required_materials={"paint": 2, "clear_coat": 1, "decal": 1},
-            duration=90,
-            quality_factor=0.9
-        )
-        
-        mtb_qa = ProductionStep(
-            id="mtb_step7",
-            name="Mountain Bike Quality Assurance",
-            required_skills={Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE},
-            required_machines=["QAStation"],
-            required_materials={},
-            duration=30,
-            quality_factor=1.5
-        )
-        
-        mtb_packaging = ProductionStep(
-            id="mtb_step8",
-            name="Mountain Bike Packaging",
-            required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE},
-            required_machines=[],
-            required_materials={"box": 1, "manual": 1, "toolkit": 1},
-            duration=20,
-            quality_factor=0.7
-        )
-        
-        # Road Bike Steps
-        road_frame_prep = ProductionStep(
-            id="road_step1",
-            name="Road Bike Frame Tube Preparation",
-            required_skills={Skill.TUBE_CUTTING: SkillLevel.ADVANCED, Skill.MACHINING: SkillLevel.INTERMEDIATE},
-            required_machines=["CuttingMachine", "CNCMachine"],
-            required_materials={"carbon_tube": 5},
-            duration=60,
-            quality_factor=1.2
-        )
-        
-        road_frame_assembly = ProductionStep(
-            id="road_step2",
-            name="Road Bike Frame Assembly",
-            required_skills={Skill.FRAME_WELDING: SkillLevel.EXPERT, Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
-            required_machines=["AssemblyStation"],
-            required_materials={},
-            duration=100,
-            quality_factor=1.3
-        )
-        
-        road_wheel_building = ProductionStep(
-            id="road_step3",
-            name="Road Bike Wheel Building",
-            required_skills={Skill.WHEEL_BUILDING: SkillLevel.EXPERT},
-            required_machines=["WheelStation"],
-            required_materials={"rim": 2, "hub": 2, "spoke": 2, "tire": 2, "tube": 2},
-            duration=90,
-            quality_factor=1.2
-        )
-        
-        road_assembly = ProductionStep(
-            id="road_step4",
-            name="Road Bike Component Assembly",
-            required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
-            required_machines=["AssemblyStation"],
-            required_materials={
-                "handlebar": 1, "stem": 1, "seat_post": 1, "saddle": 1, 
-                "front_derailleur": 1, "rear_derailleur": 1, "brake_set": 1,
-                "chain": 1, "cassette": 1, "bottom_bracket": 1, "crankset": 1
-            },
-            duration=90,
-            quality_factor=1.1
-        )
-        
-        road_paint = ProductionStep(
-            id="road_step5",
-            name="Road Bike Painting and Finishing",
-            required_skills={Skill.PAINTING: SkillLevel.EXPERT},
-            required_machines=["PaintBooth"],
-            required_materials={"paint": 1, "clear_coat": 2, "decal": 1},
-            duration=120,
-            quality_factor=1.2
-        )
-        
-        road_qa = ProductionStep(
-            id="road_step6",
-            name="Road Bike Quality Assurance",
-            required_skills={Skill.QUALITY_CONTROL: SkillLevel.EXPERT},
-            required_machines=["QAStation"],
-            required_materials={},
-            duration=45,
-            quality_factor=1.5
-        )
-        
-        road_packaging = ProductionStep(
-            id="road_step7",
-            name="Road Bike Packaging",
-            required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE},
-            required_machines=[],
-            required_materials={"box": 1, "manual": 1, "toolkit": 1},
-            duration=20,
-            quality_factor=0.7
-        )
-        
-        # Electric Bike Steps
-        ebike_frame_prep = ProductionStep(
-            id="ebike_step1",
-            name="E-Bike Frame Preparation",
-            required_skills={Skill.TUBE_CUTTING: SkillLevel.INTERMEDIATE, Skill.MACHINING: SkillLevel.INTERMEDIATE},
-            required_machines=["CuttingMachine", "CNCMachine"],
-            required_materials={"aluminum_tube": 6},
-            duration=60,
-            quality_factor=1.0
-        )
-        
-        ebike_frame_welding = ProductionStep(
-            id="ebike_step2",
-            name="E-Bike Frame Welding",
-            required_skills={Skill.FRAME_WELDING: SkillLevel.ADVANCED},
-            required_machines=["WeldingStation"],
-            required_materials={},
-            duration=100,
-            quality_factor=1.1
-        )
-        
-        ebike_electronics = ProductionStep(
-            id="ebike_step3",
-            name="E-Bike Electronics Installation",
-            required_skills={Skill.ELECTRONICS: SkillLevel.ADVANCED},
-            required_machines=["ElectronicsStation"],
-            required_materials={"motor": 1, "battery": 1, "controller": 1, "display": 1},
-            duration=90,
-            quality_factor=1.3
-        )
-        
-        ebike_wheel_building = ProductionStep(
-            id="ebike_step4",
-            name="E-Bike Wheel Building",
-            required_skills={Skill.WHEEL_BUILDING: SkillLevel.ADVANCED},
-            required_machines=["WheelStation"],
-            required_materials={"rim": 2, "hub": 2, "spoke": 2, "tire": 2, "tube": 2},
-            duration=60,
-            quality_factor=1.0
-        )
-        
-        ebike_assembly = ProductionStep(
-            id="ebike_step5",
-            name="E-Bike Component Assembly",
-            required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.ADVANCED},
-            required_machines=["AssemblyStation"],
-            required_materials={
-                "handlebar": 1, "stem": 1, "seat_post": 1, "saddle": 1, 
-                "front_derailleur": 1, "rear_derailleur": 1, "brake_set": 1,
-                "chain": 1, "cassette": 1, "bottom_bracket": 1, "crankset": 1
-            },
-            duration=120,
-            quality_factor=1.0
-        )
-        
-        ebike_paint = ProductionStep(
-            id="ebike_step6",
-            name="E-Bike Painting",
-            required_skills={Skill.PAINTING: SkillLevel.INTERMEDIATE},
-            required_machines=["PaintBooth"],
-            required_materials={"paint": 2, "clear_coat": 1, "decal": 1},
-            duration=90,
-            quality_factor=0.9
-        )
-        
-        ebike_electronics_testing = ProductionStep(
-            id="ebike_step7",
-            name="E-Bike Electronics Testing",
-            required_skills={Skill.ELECTRONICS: SkillLevel.EXPERT, Skill.QUALITY_CONTROL: SkillLevel.INTERMEDIATE},
-            required_machines=["QAStation", "ElectronicsStation"],
-            required_materials={},
-            duration=45,
-            quality_factor=1.4
-        )
-        
-        ebike_qa = ProductionStep(
-            id="ebike_step8",
-            name="E-Bike Quality Assurance",
-            required_skills={Skill.QUALITY_CONTROL: SkillLevel.ADVANCED},
-            required_machines=["QAStation"],
-            required_materials={},
-            duration=30,
-            quality_factor=1.2
-        )
-        
-        ebike_packaging = ProductionStep(
-            id="ebike_step9",
-            name="E-Bike Packaging",
-            required_skills={Skill.COMPONENT_ASSEMBLY: SkillLevel.NOVICE},
-            required_machines=[],
-            required_materials={"box": 1, "manual": 1, "toolkit": 1},
-            duration=25,
-            quality_factor=0.7
-        )
-        
-        # Create bike models
-        mountain_bike = BikeModel(
-            id="mountain",
-            name="Trail Crusher Mountain Bike",
-            type="mountain",
-            steps=[mtb_frame_prep, mtb_frame_welding, mtb_suspension_prep, 
-                   mtb_wheel_building, mtb_assembly, mtb_paint, mtb_qa, mtb_packaging],
-            base_price=899.99
-        )
+            # Request machine(s) if needed; leaving the stack cancels requests still
+            # queued and releases granted ones, as the employee request's with block does
+            with ExitStack() as held:
+                machine_requests = [
+                    held.enter_context(machine.request(priority=priority)) for machine in needed_machines
+                ]
+                yield self.env.all_of(machine_requests)
+                
+                # Process production step
+                yield self.env.timeout(work_time)
         
-        road_bike = BikeModel(
-            id="road",
-            name="Speed Demon Road Bike",
-            type="road",
-            steps=[road_frame_prep, road_frame_assembly, road_wheel_building, 
-                   road_assembly, road_paint, road_qa, road_packaging],
-            base_price=1299.99
-        )
+        self._record_step_time(self.env.now - requested)
+    
+    def _record_step_time(self, minutes: float) -> None:
+        """Write into the preallocated buffer, growing it only if the estimate fell short"""
+        i = self._step_count
+        if i < len(self._step_times):
+            self._step_times[i] = minutes
+        else:
+            self._step_times.append(minutes)
+        self._step_count = i + 1
+    
+    def produce_bike(self, order: Order, bike_index: int, done_event: simpy.Event, progress: List[int]) -> Any:
+        """SimPy process for producing a single bike within an order
         
-        electric_bike = BikeModel(
-            id="electric",
-            name="PowerGlide Electric Bike",
-            type="electric",
-            steps=[ebike_frame_prep, ebike_frame_welding, ebike_electronics, 
-                   ebike_wheel_building, ebike_assembly, ebike_paint, 
-                   ebike_electronics_testing, ebike_qa, ebike_packaging],
-            base_price=1899.99
-        )
+        progress holds [bikes finished, bikes ordered]; the last bike to finish
+        triggers done_event for the whole order.
+        """
+        total_time = 0
+        start = self.env.now
+        priority = order.priority
         
-        factory.add_bike_model(mountain_bike)
-        factory.add_bike_model(road_bike)
-        factory.add_bike_model(electric_bike)
+        for name, duration, pool, machines in self._plans[order.bike_model.id]:
+            yield from self._run_step(pool, machines, duration, priority)
+            total_time += duration
+            
+            # Log step completion
+            self._log.append((self.env.now, "step_done", order.id, bike_index, name))
         
-        return factory
+        # Log bike completion
+        _record_bikes(self.stats, self._lead_times, 1, total_time, self.env.now - start)
+        self._log.append((self.env.now, "bike_done", order.id, bike_index))
+        progress[0] += 1
+        if progress[0] == progress[1]:
+            done_event.succeed()
+        return total_time
     
-    def produce_bike(self, order_id: str, bike_index: int, bike_model: BikeModel) -> Any:
-        """SimPy process for producing a single bike within an order"""
+    def produce_bike_batch(self, order: Order) -> Any:
+        """SimPy process for producing count bikes of an order together
+        
+        Each step acquires its resources once and works through the whole batch
+        before releasing them, instead of every bike queueing separately.
+        """
         total_time = 0
+        start = self.env.now
+        count = order.quantity
+        priority = order.priority
         
-        for step in bike_model.steps:
-            # Find needed resources
-            needed_employees = []
-            for skill, level in step.required_skills.items():
-                suitable_employees = [e for e in self.factory.employees if e.has_skill(skill, level)]
-                if suitable_employees:
-                    needed_employees.append(suitable_employees[0])
-            
-            needed_machines = []
-            for machine_type in step.required_machines:
-                machine_resource = self.machine_resources.get(machine_type)
-                if machine_resource:
-                    needed_machines.append(machine_resource)
+        for name, duration, pool, machines in self._plans[order.bike_model.id]:
+            yield from self._run_step(pool, machines, duration * count, priority)
+            total_time += duration
             
-            # Request employee(s)
-            with self.human_resources.get(step.required_skills[Skill.FRAME_WELDING]) as employee_request:
-                yield employee_request
-                
-                # Request machine(s) if needed
-                machine_requests = []
-                for machine in needed_machines:
-                    machine_requests.append(machine.request())
-                
-                for request in machine_requests:
-                    yield request
-                
-                # Process production step
-                step_time = step.duration
-                total_time += step_time
-                yield self.env.timeout(step_time)
-                
-                # Release machine resources
-                for i, machine in enumerate(needed_machines):
-                    machine.release(machine_requests[i])
-                
-                # Log step completion
-                print(f"{self.env.now}: Completed {step.name} for order {order_id}, bike {bike_index}")
+            # Log step completion
+            self._log.append((self.env.now, "batch_step_done", order.id, count, name))
         
         # Log bike completion
-        self.simulation_stats["bikes_produced"] += 1
-        self.simulation_stats["total_production_time"] += total_time
-        print(f"{self.env.now}: Completed bike {bike_index} for order {order_id}")
-        return total_time
+        _record_bikes(self.stats, self._lead_times, count, total_time, self.env.now - start)
+        self._log.append((self.env.now, "batch_done", order.id, count))
+        return total_time * count
     
     def process_order(self, order: Order) -> Any:
         """SimPy process for handling an order"""
         # Log order receipt
-        self.simulation_stats["orders_received"] += 1
-        print(f"{self.env.now}: Received order {order.id} for {order.quantity} {order.bike_model.name}(s)")
+        self.stats.orders_received += 1
+        self._log.append((self.env.now, "order_received", order.id, order.quantity, order.bike_model.name))
         
-        # Check material availability
-        material_requirements = {}
-        for step in order.bike_model.steps:
-            for material_id, quantity in step.required_materials.items():
-                material_requirements[material_id] = material_requirements.get(material_id, 0) + quantity * order.quantity
+        inventory = self.factory.inventory
+        requirements = order.bike_model.materials_per_unit
+        count = order.quantity
         
-        for material_id, needed_quantity in material_requirements.items():
-            if material_id not in self.factory.inventory or self.factory.inventory[material_id].quantity < needed_quantity:
-                print(f"{self.env.now}: Order {order.id} cancelled due to insufficient materials")
-                self.simulation_stats["orders_cancelled"] += 1
+        # Check material availability, unless the previous reservation for this model left
+        # every one of its materials with at least the most this order can take of any,
+        # and no material has been added or replaced since
+        inventory_version = self.factory.resource_scheduler.inventory_version
+        last_model_id, last_version, low_water = self._low_water
+        if (last_model_id != order.bike_model.id or last_version != inventory_version
+                or low_water < self._peak_need[last_model_id] * count):
+            if any(material_id not in inventory or inventory[material_id].quantity < needed * count
+                   for material_id, needed in requirements.items()):
+                self._log.append((self.env.now, "order_cancelled", order.id))
+                self.stats.orders_cancelled += 1
                 return
         
         # Reserve materials
-        for material_id, needed_quantity in material_requirements.items():
-            self.factory.inventory[material_id].quantity -= needed_quantity
+        low_water = float("inf")
+        for material_id, needed in requirements.items():
+            material = inventory[material_id]
+            material.quantity -= needed * count
+            if material.quantity < low_water:
+                low_water = material.quantity
+        self._low_water = (order.bike_model.id, inventory_version, low_water)
         
-        # Start production for each bike
         order.status = OrderStatus.IN_PRODUCTION
-        bike_processes = []
-        for i in range(order.quantity):
-            process = self.env.process(self.produce_bike(order.id, i+1, order.bike_model))
-            bike_processes.append(process)
-        
-        # Wait for all bikes to be completed
-        yield self.env.all_of(bike_processes)
+        if self.batch_production:
+            # Produce the whole order in one process
+            yield self.env.process(self.produce_bike_batch(order))
+        else:
+            # Start production for each bike
+            done_event = self.env.event()
+            progress = [0, order.quantity]
+            for i in range(order.quantity):
+                self.env.process(self.produce_bike(order, i+1, done_event, progress))
+            
+            # Wait for all bikes to be completed
+            yield done_event
         
         # Mark order as completed
         order.status = OrderStatus.COMPLETED
-        self.simulation_stats["orders_completed"] += 1
-        print(f"{self.env.now}: Completed order {order.id}")
+        self.stats.orders_completed += 1
+        self._log.append((self.env.now, "order_completed", order.id))
     
     def order_generator(self, order_rate: float, max_orders: int) -> Any:
         """Generate random orders at specified rate"""
+        # Draw every order's parameters up front; the loop below only indexes them
+        rng = self._rng
+        randint, expovariate = rng.randint, rng.expovariate
+        bike_models = rng.choices(list(self.factory.bike_models.values()), k=max_orders)
+        quantities = [randint(1, _MAX_ORDER_QUANTITY) for _ in range(max_orders)]
+        due_days = [randint(3, 14) for _ in range(max_orders)]
+        interarrival_times = [expovariate(1.0 / order_rate) for _ in range(max_orders)]
+        now = datetime.now()
+        
         for i in range(max_orders):
             # Create a random order
             customer = f"Customer {i+1}"
-            bike_model_id = random.choice(list(self.factory.bike_models.keys()))
-            bike_model = self.factory.bike_models[bike_model_id]
-            quantity = random.randint(1, 5)
-            due_date = datetime.now() + timedelta(days=random.randint(3, 14))
+            due_date = now + timedelta(days=due_days[i])
             
-            order = Order.create(customer, bike_model, quantity, due_date)
+            order = Order.create(customer, bike_models[i], quantities[i], due_date)
             
             # Start processing order
             self.env.process(self.process_order(order))
             
             # Wait until next order
-            interarrival_time = random.expovariate(1.0 / order_rate)
-            yield self.env.timeout(interarrival_time)
+            yield self.env.timeout(interarrival_times[i])
     
     def run_simulation(self, duration: int, order_rate: float, max_orders: int) -> Dict:
         """Run the simulation for specified duration"""
+        # At most one step sample per bike and step, so size the buffer for that up front
+        max_steps = max(map(len, self._plans.values()), default=0)
+        self._step_times = array.array('d', [0.0]) * (max_orders * _MAX_ORDER_QUANTITY * max_steps)
+        self._step_count = 0
         self.env.process(self.order_generator(order_rate, max_orders))
         self.env.run(until=duration)
         
         # Add some calculated statistics
-        if self.simulation_stats["bikes_produced"] > 0:
-            self.simulation_stats["avg_production_time"] = self.simulation_stats["total_production_time"] / self.simulation_stats["bikes_produced"]
+        stats = self.stats
+        if stats.bikes_produced > 0:
+            stats.avg_production_time = stats.total_production_time / stats.bikes_produced
         else:
-            self.simulation_stats["avg_production_time"] = 0
+            stats.avg_production_time = 0
+        for name, value in _compute_stats(self._lead_times).items():
+            setattr(stats, f"lead_time_{name}", value)
+        for name, value in _compute_stats(self._step_times[:self._step_count]).items():
+            setattr(stats, f"step_time_{name}", value)
+        
+        if self.verbose:
+            self.write_log()
             
-        return self.simulation_stats
+        return asdict(stats)
+    
+    def write_log(self, stream: Optional[Any] = None) -> None:
+        """Format the buffered event log and write it out in one go"""
+        stream = stream or sys.stdout
+        lines = [_LOG_FORMATS[record[1]].format(record[0], *record[2:]) for record in self._log]
+        if lines:
+            stream.write("\n".join(lines) + "\n")
 
 
-def run_simulation():
-    """Run a bike factory simulation"""
-    print("Starting Bike Factory Simulation")
-    
+def _one_run(seed: Optional[int]) -> Dict:
+    """Build and run one simulation; module-level so worker processes can unpickle it"""
     # Create SimPy environment
     env = simpy.Environment()
     
     # Create and run simulation
-    simulation = FactorySimulation(env)
+    simulation = FactorySimulation(env, seed=seed)
     
     # Run for 480 minutes (8 hours) with orders arriving every 90 minutes on average
-    stats = simulation.run_simulation(duration=480, order_rate=90, max_orders=10)
+    return simulation.run_simulation(duration=480, order_rate=90, max_orders=10)
+
+def run_replications(reps: int, max_workers: Optional[int] = None) -> List[Dict]:
+    """Run independent replications, seeded 0..reps-1, in parallel worker processes"""
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_one_run, range(reps)))
+
+def run_simulation(reps: int = 1):
+    """Run a bike factory simulation, averaging the results over reps replications"""
+    print("Starting Bike Factory Simulation")
+    
+    if reps > 1:
+        runs = run_replications(reps)
+        stats = {
+            key: sum(run[key] for run in runs) / reps
+            for key, value in runs[0].items()
+            if isinstance(value, (int, float))
+        }
+    else:
+        stats = _one_run(None)
     
     # Print results
     print("\nSimulation Results:")
@@ -1,12 +1,23 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from bikefactory.domain.entity import Entity
-from bikefactory.domain.skill import Skill
+from bikefactory.domain.skill import LEVEL_RANK, Skill, SkillKind, SkillLevel
 from bikefactory.domain.shift import Shift
 
-@dataclass
+@dataclass(slots=True)
 class Employee(Entity):
-    skills: list[Skill]
+    skills: frozenset[Skill]
     shift: Shift
+    # Every (kind, level) the employee meets, including the levels below each one held
+    _skill_set: frozenset[tuple[SkillKind, SkillLevel]] = field(init=False, repr=False, default=frozenset())
 
+    def __post_init__(self):
+        self._skill_set = frozenset(
+            (skill.kind, level)
+            for skill in self.skills
+            for level in SkillLevel
+            if LEVEL_RANK[level] <= LEVEL_RANK[skill.level]
+        )
 
+    def has_skill(self, kind: SkillKind, min_level: SkillLevel) -> bool:
+        return (kind, min_level) in self._skill_set
@@ -1,13 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from itertools import count
 from uuid import uuid4
 
+# Creation order of entities; cheaper than reading the wall clock for every object
+_tick = count()
 
-@dataclass
+
+@dataclass(slots=True, kw_only=True)
 class Entity:
     uid: str = field(default_factory=lambda: str(uuid4()))
-    name: str 
+    name: str
     description: str
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-
+    created_at: int = field(default_factory=lambda: next(_tick))
+    updated_at: int = field(default_factory=lambda: next(_tick))
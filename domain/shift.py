@@ -1,42 +1,49 @@
-from dataclasses import dataclass
+import datetime
+from dataclasses import dataclass, field
 from enum import Enum
 from bikefactory.domain.entity import Entity
 
-@dataclass
+@dataclass(slots=True)
 class Break(Entity):
-    start_time: datetime
-    end_time: datetime
+    start_time: datetime.time
+    end_time: datetime.time
 
-@dataclass
+@dataclass(slots=True)
 class Shift(Entity):
-    start_time: datetime
-    end_time: datetime
-    breaks: list[Break]
+    start_time: datetime.time
+    end_time: datetime.time
+    breaks: tuple[Break, ...]
 
-@dataclass
+@dataclass(slots=True)
 class MorningShift(Shift):
-    start_time: datetime = datetime.time(6, 0)
-    end_time: datetime = datetime.time(14, 0)
-    breaks: list[Break] = [
-        Break(start_time=datetime.time(10, 0), end_time=datetime.time(10, 30)),
-        Break(start_time=datetime.time(12, 0), end_time=datetime.time(12, 30))
-    ]
+    start_time: datetime.time = datetime.time(6, 0)
+    end_time: datetime.time = datetime.time(14, 0)
+    breaks: tuple[Break, ...] = field(default_factory=lambda: (
+        Break(name="Morning break", description="10:00-10:30",
+              start_time=datetime.time(10, 0), end_time=datetime.time(10, 30)),
+        Break(name="Lunch break", description="12:00-12:30",
+              start_time=datetime.time(12, 0), end_time=datetime.time(12, 30))
+    ))
 
-@dataclass
+@dataclass(slots=True)
 class AfternoonShift(Shift):
-    start_time: datetime = datetime.time(14, 0)
-    end_time: datetime = datetime.time(22, 0)
-    breaks: list[Break] = [
-        Break(start_time=datetime.time(16, 0), end_time=datetime.time(16, 30)),
-        Break(start_time=datetime.time(18, 0), end_time=datetime.time(18, 30))
-    ]
+    start_time: datetime.time = datetime.time(14, 0)
+    end_time: datetime.time = datetime.time(22, 0)
+    breaks: tuple[Break, ...] = field(default_factory=lambda: (
+        Break(name="Afternoon break", description="16:00-16:30",
+              start_time=datetime.time(16, 0), end_time=datetime.time(16, 30)),
+        Break(name="Dinner break", description="18:00-18:30",
+              start_time=datetime.time(18, 0), end_time=datetime.time(18, 30))
+    ))
 
-@dataclass
+@dataclass(slots=True)
 class NightShift(Shift):
-    start_time: datetime = datetime.time(22, 0)
-    end_time: datetime = datetime.time(6, 0)
-    breaks: list[Break] = [
-        Break(start_time=datetime.time(23, 0), end_time=datetime.time(23, 30)),
-        Break(start_time=datetime.time(1, 0), end_time=datetime.time(1, 30))
-    ]
+    start_time: datetime.time = datetime.time(22, 0)
+    end_time: datetime.time = datetime.time(6, 0)
+    breaks: tuple[Break, ...] = field(default_factory=lambda: (
+        Break(name="Night break", description="23:00-23:30",
+              start_time=datetime.time(23, 0), end_time=datetime.time(23, 30)),
+        Break(name="Early morning break", description="01:00-01:30",
+              start_time=datetime.time(1, 0), end_time=datetime.time(1, 30))
+    ))
 
@@ -7,54 +7,56 @@ class SkillLevel(Enum):
     ADVANCED = "advanced"
     EXPERT = "expert"
 
-@dataclass
+# Position of each level in ascending order, for "at least this level" checks
+LEVEL_RANK = {level: rank for rank, level in enumerate(SkillLevel)}
+
+class SkillKind(Enum):
+    MOLDING = "molding"
+    CUTTING = "cutting"
+    WELDING = "welding"
+    MACHINING = "machining"
+    ASSEMBLY = "component_assembly"
+    PAINTING = "painting"
+    SUSPENSION_TUNING = "suspension_tuning"
+    MAINTENANCE = "maintenance"
+    QUALITY_CONTROL = "quality_control"
+
+    @property
+    def description(self) -> str:
+        return _DESCRIPTIONS[self]
+
+_DESCRIPTIONS = {
+    SkillKind.MOLDING: "Molding plastic parts",
+    SkillKind.CUTTING: "Cutting parts",
+    SkillKind.WELDING: "Welding metal parts",
+    SkillKind.MACHINING: "Operating CNC machines",
+    SkillKind.ASSEMBLY: "Assembling bike components",
+    SkillKind.PAINTING: "Painting and finishing",
+    SkillKind.SUSPENSION_TUNING: "Adjusting and tuning suspension systems",
+    SkillKind.MAINTENANCE: "Machine maintenance",
+    SkillKind.QUALITY_CONTROL: "Testing and quality assurance",
+}
+
+@dataclass(frozen=True, slots=True)
 class Skill:
-    name: str
-    description: str
+    kind: SkillKind
     level: SkillLevel
 
-@dataclass
-class Molding(Skill):
-    name: str = "molding"
-    description: str = "Molding plastic parts"
-
-@dataclass
-class Cutting(Skill):
-    name: str = "cutting"
-    description: str = "Cutting parts"
-
-@dataclass
-class Welding(Skill):
-    name: str = "welding"
-    description: str = "Welding metal parts"
-
-@dataclass
-class Machining(Skill):
-    name: str = "machining"
-    description: str = "Operating CNC machines"
-
-
-@dataclass
-class Assembly(Skill):
-    name: str = "component_assembly"
-    description: str = "Assembling bike components"
-
-@dataclass
-class Painting(Skill):
-    name: str = "painting"
-    description: str = "Painting and finishing"
-
-@dataclass
-class SuspensionTuning(Skill):
-    name: str = "suspension_tuning"
-    description: str = "Adjusting and tuning suspension systems"
-
-@dataclass
-class Maintenance(Skill):
-    name: str = "maintenance"
-    description: str = "Machine maintenance"
-
-@dataclass
-class QualityControl(Skill):
-    name: str = "quality_control"
-    description: str = "Testing and quality assurance"
+    @property
+    def name(self) -> str:
+        return self.kind.value
+
+    @property
+    def description(self) -> str:
+        return self.kind.description
+
+
+_interned: dict[tuple[SkillKind, SkillLevel], Skill] = {}
+
+def intern_skill(kind: SkillKind, level: SkillLevel) -> Skill:
+    """Return the shared instance of a skill kind at a level"""
+    key = (kind, level)
+    skill = _interned.get(key)
+    if skill is None:
+        skill = _interned[key] = Skill(kind, level)
+    return skill
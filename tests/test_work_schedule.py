@@ -0,0 +1,32 @@
+import unittest
+from datetime import date, datetime
+
+from d2 import DayOfWeek, Shift, WorkSchedule
+
+
+class CoversIntervalTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = WorkSchedule(
+            shifts={DayOfWeek.MONDAY: Shift.NIGHT, DayOfWeek.TUESDAY: Shift.NIGHT},
+            vacation_days={date(2024, 1, 3)},  # Wednesday
+        )
+
+    def test_night_shift_within_schedule(self):
+        # Monday 22:00 to Tuesday 06:00
+        self.assertTrue(self.schedule.covers_interval(datetime(2024, 1, 1, 22), datetime(2024, 1, 2, 6)))
+
+    def test_night_shift_ending_on_vacation_day(self):
+        # Tuesday 22:00 to Wednesday 06:00 runs into the vacation day
+        self.assertFalse(self.schedule.covers_interval(datetime(2024, 1, 2, 23), datetime(2024, 1, 3, 5)))
+
+    def test_night_shift_ending_at_midnight_before_vacation_day(self):
+        # Tuesday 22:00 to Wednesday 00:00 stops short of the vacation day
+        self.assertTrue(self.schedule.covers_interval(datetime(2024, 1, 2, 22), datetime(2024, 1, 3)))
+
+    def test_empty_interval_is_covered(self):
+        start = datetime(2024, 1, 3, 12)
+        self.assertTrue(self.schedule.covers_interval(start, start))
+
+
+if __name__ == "__main__":
+    unittest.main()